@@ -7,20 +7,125 @@ Builds robust understanding through "desirable difficulties".
 Innovation: Inspired by Deep Knowledge Tracing adversarial training.
 Research backing: Struggle → deeper learning (Bjork's desirable difficulties).
 """
-from typing import Dict, List, Optional, Tuple
-from pydantic import BaseModel
-import json
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import BaseModel, ConfigDict
+import asyncio
+import importlib.util
+import itertools
+import logging
 import random
+import re
 
-try:
+import numpy as np
+import orjson
+
+# openai is imported on first LLM call, not at module load (cold-start time)
+OPENAI_AVAILABLE = importlib.util.find_spec('openai') is not None
+
+# HTTP/2 multiplexing needs the optional h2 package
+_HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+# Keep-alive pool shared by every LLM request of an instance
+_HTTP_POOL_LIMITS = {'max_connections': 64, 'max_keepalive_connections': 64}
+
+# Per-request LLM timeout in seconds (the SDK default is 10 minutes)
+_LLM_TIMEOUT = 30.0
+
+logger = logging.getLogger("learnpath.adversarial")
+
+
+@lru_cache(maxsize=None)
+def _openai():
+    """Import the openai SDK once, on first use."""
     import openai
-    OPENAI_AVAILABLE = True
+    return openai
+
+
+def _pooled_openai_client(api_key: Optional[str], use_async: bool = True):
+    """
+    OpenAI client on a pooled httpx client (keep-alive, HTTP/2 when available).
+    
+    The async client does no SDK-level retries: _request_llm_json owns the
+    retry policy. The blocking client keeps the SDK's default retries.
+    """
+    import httpx
+    
+    openai = _openai()
+    limits = httpx.Limits(**_HTTP_POOL_LIMITS)
+    if use_async:
+        return openai.AsyncOpenAI(
+            api_key=api_key,
+            timeout=_LLM_TIMEOUT,
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=limits, http2=_HTTP2_AVAILABLE)
+        )
+    return openai.OpenAI(
+        api_key=api_key,
+        timeout=_LLM_TIMEOUT,
+        http_client=httpx.Client(limits=limits, http2=_HTTP2_AVAILABLE)
+    )
+
+
+@lru_cache(maxsize=None)
+def _retryable_llm_errors() -> Tuple[type, ...]:
+    """Transient LLM failures worth retrying: rate limits, timeouts, connection errors, unparseable replies."""
+    openai = _openai()
+    return (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, ValueError)
+
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
 except ImportError:
-    OPENAI_AVAILABLE = False
+    NUMBA_AVAILABLE = False
+
+
+# Outermost {...} block in an LLM reply (tolerates prose or markdown fences around it)
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.S)
+
+
+def _parse_llm_json(content: str) -> Dict:
+    """
+    Parse an LLM reply as a JSON object with orjson, recovering the embedded
+    {...} block when the model wraps it in fences or commentary.
+    
+    Raises ValueError (orjson.JSONDecodeError) if no JSON object can be recovered.
+    """
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        match = _JSON_OBJECT_RE.search(content or '')
+        if match is None:
+            raise
+        return orjson.loads(match.group(0))
+
+
+# Difficulty levels in int8 code order (index into the XP table)
+_DIFFICULTY_LEVELS = ('hard', 'very_hard', 'expert')
+_DIFFICULTY_CODES = {level: code for code, level in enumerate(_DIFFICULTY_LEVELS)}
+
+# Gauntlet difficulty progression; an n-question gauntlet uses the first n rungs
+_GAUNTLET_SCHEDULE = ('hard', 'hard', 'very_hard', 'very_hard', 'expert')
+
+
+def _total_xp(difficulty_codes: np.ndarray, xp_table: np.ndarray) -> int:
+    """Sum XP over int8 difficulty codes (index loop so Numba can vectorize it)."""
+    total = 0
+    for i in range(difficulty_codes.shape[0]):
+        total += xp_table[difficulty_codes[i]]
+    return total
+
+
+if NUMBA_AVAILABLE:
+    _total_xp = njit(cache=True)(_total_xp)
 
 
 class Misconception(BaseModel):
     """Common misconception for a concept."""
+    model_config = ConfigDict(frozen=True)
+    
     concept: str
     misconception_text: str
     correct_understanding: str
@@ -29,6 +134,8 @@ class Misconception(BaseModel):
 
 class AdversarialQuestion(BaseModel):
     """Challenging question targeting a misconception."""
+    model_config = ConfigDict(frozen=True)  # cached variants are shared between requests
+    
     question_id: str
     concept: str
     question_text: str
@@ -50,6 +157,69 @@ class AdversarialResponse(BaseModel):
     confidence: Optional[int] = None  # 1-5 if asked
 
 
+# Predefined challenging questions (template fallback when no LLM is available)
+_CHALLENGE_TEMPLATES = {
+    'recursion': {
+        'question': "What is the output of this recursive function?\n\n```python\ndef mystery(n):\n    if n <= 1:\n        return 1\n    return n + mystery(n-2)\n```\n\nFor mystery(5):",
+        'options': [
+            "9 (correct: 5+3+1)",
+            "15 (trap: thinking it's 5+4+3+2+1)",
+            "6 (distractor)",
+            "Error: infinite recursion (distractor)"
+        ],
+        'correct': 0,
+        'trap': 1,
+        'explanation': "The trap answer assumes all numbers are summed, but the function skips even numbers (n-2). Correct trace: 5 + mystery(3) → 5 + (3 + mystery(1)) → 5 + 3 + 1 = 9"
+    },
+    'loops': {
+        'question': "How many times does 'X' print?\n\n```python\nfor i in range(5):\n    if i % 2 == 0:\n        continue\n    print('X')\n```",
+        'options': [
+            "2 (correct: only i=1 and i=3)",
+            "5 (trap: forgetting continue skips)",
+            "3 (trap: including i=0)",
+            "0 (distractor)"
+        ],
+        'correct': 0,
+        'trap': 1,
+        'explanation': "The trap assumes all iterations print. But 'continue' skips even numbers (0,2,4). Only odd numbers (1,3) print, so 2 times."
+    },
+    'functions': {
+        'question': "What does this function return?\n\n```python\ndef transform(lst):\n    lst.append(99)\n    return lst\n\noriginal = [1, 2]\nresult = transform(original)\nprint(len(original))\n```",
+        'options': [
+            "3 (correct: list mutated)",
+            "2 (trap: thinking copy was made)",
+            "Error (distractor)",
+            "1 (distractor)"
+        ],
+        'correct': 0,
+        'trap': 1,
+        'explanation': "The trap assumes the function creates a copy. But lists are mutable and passed by reference, so 'original' is modified directly. Correct: len([1,2,99]) = 3"
+    }
+}
+
+
+@lru_cache(maxsize=64)
+def _template_payload(concept: str, difficulty: str) -> Optional[Dict]:
+    """
+    Static AdversarialQuestion fields for a template, memoized per (concept, difficulty).
+    
+    The returned dict is shared between calls; treat it as read-only.
+    """
+    template = _CHALLENGE_TEMPLATES.get(concept)
+    if template is None:
+        return None
+    
+    return {
+        'concept': concept,
+        'question_text': template['question'],
+        'options': template['options'],
+        'correct_answer': template['correct'],
+        'trap_answer': template['trap'],
+        'explanation': template['explanation'],
+        'difficulty': difficulty
+    }
+
+
 class AdversarialChallengeSystem:
     """
     Generates and manages adversarial learning challenges.
@@ -58,18 +228,63 @@ class AdversarialChallengeSystem:
     Goal: Build resilient understanding, not brittle memorization.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 10,
+        max_attempts: int = 5,
+        llm_batch_size: int = 5,
+        question_cache_size: int = 1024,
+        n_variants: int = 5
+    ):
         """
         Args:
             api_key: OpenAI API key for GPT-4 generation
+            max_concurrency: max in-flight LLM requests (respects OpenAI RPM/TPM)
+            max_attempts: attempts per LLM request before falling back to templates
+            llm_batch_size: max questions packed into a single LLM prompt (4-8 is the sweet spot)
+            question_cache_size: max (concept, misconception, difficulty) keys kept in the question cache
+            n_variants: variants generated per (concept, misconception, difficulty), one per
+                        cache miss, before the key is served from cache at random
         """
         self.use_openai = OPENAI_AVAILABLE
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.llm_batch_size = max(1, llm_batch_size)
+        self.question_cache_size = question_cache_size
+        self.n_variants = max(1, n_variants)
         
-        if self.use_openai and api_key:
-            openai.api_key = api_key
+        # Pooled clients are created on first use; the async client and
+        # concurrency limit are created lazily inside the event loop
+        self._client = None
+        self._async_client = None
+        self._llm_semaphore: Optional[asyncio.Semaphore] = None
         
-        # Common misconceptions database
+        # LRU cache of LLM-generated variants keyed by (concept, misconception, difficulty),
+        # filled one variant per miss up to n_variants. Per-process; multi-worker
+        # deployments can back this with Redis using the same key.
+        self._question_cache: "OrderedDict[Tuple[str, str, str], List[AdversarialQuestion]]" = OrderedDict()
+        
+        # Per-instance PRNG (variant picks, backoff jitter) and id counter, so the
+        # hot path never touches the shared module-level random state
+        self._rng = random.Random()
+        self._ids = itertools.count(self._rng.getrandbits(16))
+        
+        # Common misconceptions database, indexed by concept (most frequent first)
         self.misconceptions = self._load_misconceptions()
+        self._by_concept: Dict[str, List[Misconception]] = {}
+        for m in self.misconceptions:
+            self._by_concept.setdefault(m.concept, []).append(m)
+        for concept_misconceptions in self._by_concept.values():
+            concept_misconceptions.sort(key=lambda m: -m.frequency)
+        
+        self._generic_misconception = Misconception(
+            concept='',
+            misconception_text="Surface-level understanding without deep comprehension",
+            correct_understanding="Full conceptual understanding",
+            frequency=0.5
+        )
         
         # Gamification parameters
         self.difficulty_xp = {
@@ -77,6 +292,15 @@ class AdversarialChallengeSystem:
             'very_hard': 100,
             'expert': 200
         }
+        self._xp_table = np.array(
+            [self.difficulty_xp[level] for level in _DIFFICULTY_LEVELS], dtype=np.int32
+        )
+        
+        # (total_xp, difficulty_distribution) per gauntlet length, computed once
+        self._gauntlet_stats = [
+            self._difficulty_stats(_GAUNTLET_SCHEDULE[:n])
+            for n in range(len(_GAUNTLET_SCHEDULE) + 1)
+        ]
     
     def generate_adversarial_question(
         self,
@@ -99,17 +323,65 @@ class AdversarialChallengeSystem:
         misconception = self._identify_misconception(concept, student_errors)
         
         if self.use_openai:
-            return self._generate_with_llm(concept, misconception, difficulty)
+            return self._generate_with_llm_sync(concept, misconception, difficulty)
         else:
             return self._generate_with_template(concept, misconception, difficulty)
     
-    def _generate_with_llm(
+    async def generate_adversarial_question_async(
+        self,
+        concept: str,
+        student_errors: List[Dict],
+        difficulty: str = 'hard'
+    ) -> AdversarialQuestion:
+        """Async counterpart of generate_adversarial_question (non-blocking LLM call)."""
+        misconception = self._identify_misconception(concept, student_errors)
+        
+        if self.use_openai:
+            return await self._generate_with_llm(concept, misconception, difficulty)
+        else:
+            return self._generate_with_template(concept, misconception, difficulty)
+    
+    async def generate_adversarial_questions(
+        self,
+        specs: List[Tuple[str, List[Dict], str]]
+    ) -> List[AdversarialQuestion]:
+        """
+        Generate several adversarial questions, packing up to llm_batch_size
+        specs into each LLM prompt.
+        
+        Args:
+            specs: list of (concept, student_errors, difficulty) tuples
+            
+        Returns:
+            questions in the same order as specs
+        """
+        items = [
+            (concept, self._identify_misconception(concept, student_errors), difficulty)
+            for concept, student_errors, difficulty in specs
+        ]
+        
+        if not self.use_openai:
+            return [self._generate_with_template(*item) for item in items]
+        
+        questions = [self._get_cached_question(*item) for item in items]
+        misses = [i for i, q in enumerate(questions) if q is None]
+        
+        batches = await asyncio.gather(*[
+            self._generate_with_llm_batch([items[i] for i in misses[j:j + self.llm_batch_size]])
+            for j in range(0, len(misses), self.llm_batch_size)
+        ])
+        for i, q in zip(misses, (q for batch in batches for q in batch)):
+            questions[i] = q
+        
+        return questions
+    
+    def _build_llm_messages(
         self,
         concept: str,
         misconception: Misconception,
         difficulty: str
-    ) -> AdversarialQuestion:
-        """Generate adversarial question using GPT-4."""
+    ) -> List[Dict[str, str]]:
+        """Build the chat messages for adversarial question generation."""
         
         prompt = f"""Create a challenging multiple-choice question for the concept "{concept}".
 
@@ -132,35 +404,272 @@ Output JSON format:
 }}
 """
         
+        return [
+            {"role": "system", "content": "You are an expert in creating challenging educational assessments that build deep understanding."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _build_llm_batch_messages(
+        self,
+        items: List[Tuple[str, Misconception, str]]
+    ) -> List[Dict[str, str]]:
+        """Build chat messages asking for one question per (concept, misconception, difficulty) spec."""
+        
+        spec_lines = "\n".join(
+            f"""{i}. Concept: "{concept}" | Difficulty: {difficulty}
+   Target Misconception: {misconception.misconception_text}
+   Correct Understanding: {misconception.correct_understanding}"""
+            for i, (concept, misconception, difficulty) in enumerate(items, start=1)
+        )
+        
+        prompt = f"""Create {len(items)} challenging multiple-choice questions, one for each spec below.
+
+{spec_lines}
+
+Requirements (for every question):
+1. Create a question where the misconception leads to a plausible-but-wrong answer
+2. Include 4 options: 1 correct, 1 trap (misconception-based), 2 distractors
+3. Make it intellectually challenging, not just tricky
+4. Match the difficulty level of its spec
+
+Output JSON format, with questions in the same order as the specs:
+{{
+    "questions": [
+        {{
+            "question": "Your question here",
+            "options": ["A", "B", "C", "D"],
+            "correct_index": 0-3,
+            "trap_index": 0-3,
+            "explanation": "Why the trap is wrong and correct is right"
+        }}
+    ]
+}}
+"""
+        
+        return [
+            {"role": "system", "content": "You are an expert in creating challenging educational assessments that build deep understanding."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _next_question_id(self, concept: str) -> str:
+        """Unique question id from the per-instance counter."""
+        return f"adv_{concept}_{next(self._ids):04x}"
+
+    def _question_from_llm_result(
+        self,
+        concept: str,
+        misconception: Misconception,
+        difficulty: str,
+        result: Dict
+    ) -> AdversarialQuestion:
+        """Convert parsed LLM JSON output into an AdversarialQuestion."""
+        return AdversarialQuestion(
+            question_id=self._next_question_id(concept),
+            concept=concept,
+            question_text=result['question'],
+            options=result['options'],
+            correct_answer=result['correct_index'],
+            trap_answer=result['trap_index'],
+            explanation=result['explanation'],
+            difficulty=difficulty,
+            misconception_targeted=misconception.misconception_text
+        )
+    
+    def _get_cached_question(
+        self,
+        concept: str,
+        misconception: Misconception,
+        difficulty: str
+    ) -> Optional[AdversarialQuestion]:
+        """
+        Return a random cached variant (with a fresh question_id), or None on
+        miss. Keys with fewer than n_variants variants count as misses, so
+        each miss (single or batched) adds one variant until the key is full.
+        """
+        key = (concept, misconception.misconception_text, difficulty)
+        variants = self._question_cache.get(key)
+        if variants is None or len(variants) < self.n_variants:
+            return None
+        
+        self._question_cache.move_to_end(key)
+        return self._rng.choice(variants).model_copy(
+            update={'question_id': self._next_question_id(concept)}
+        )
+    
+    def _cache_question(
+        self,
+        concept: str,
+        misconception: Misconception,
+        difficulty: str,
+        question: AdversarialQuestion
+    ):
+        """Add a generated variant (up to n_variants per key), evicting the least recently used keys."""
+        key = (concept, misconception.misconception_text, difficulty)
+        variants = self._question_cache.setdefault(key, [])
+        if len(variants) < self.n_variants:
+            variants.append(question)
+        self._question_cache.move_to_end(key)
+        while len(self._question_cache) > self.question_cache_size:
+            self._question_cache.popitem(last=False)
+    
+    def _generate_with_llm_sync(
+        self,
+        concept: str,
+        misconception: Misconception,
+        difficulty: str
+    ) -> AdversarialQuestion:
+        """
+        Blocking counterpart of _generate_with_llm for synchronous callers.
+        
+        Prefer generate_adversarial_question_async inside FastAPI handlers.
+        """
+        cached = self._get_cached_question(concept, misconception, difficulty)
+        if cached is not None:
+            return cached
+        
         try:
-            response = openai.ChatCompletion.create(
+            if self._client is None:
+                self._client = _pooled_openai_client(self.api_key, use_async=False)
+            
+            response = self._client.chat.completions.create(
                 model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert in creating challenging educational assessments that build deep understanding."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._build_llm_messages(concept, misconception, difficulty),
                 temperature=0.8,
                 max_tokens=500
             )
             
-            result = json.loads(response.choices[0].message.content)
+            question = self._question_from_llm_result(
+                concept, misconception, difficulty, _parse_llm_json(response.choices[0].message.content)
+            )
+            self._cache_question(concept, misconception, difficulty, question)
             
-            return AdversarialQuestion(
-                question_id=f"adv_{concept}_{random.randint(1000, 9999)}",
-                concept=concept,
-                question_text=result['question'],
-                options=result['options'],
-                correct_answer=result['correct_index'],
-                trap_answer=result['trap_index'],
-                explanation=result['explanation'],
-                difficulty=difficulty,
-                misconception_targeted=misconception.misconception_text
+            return question
+            
+        except Exception as e:
+            logger.warning("LLM generation failed: %s, using template", e)
+            return self._generate_with_template(concept, misconception, difficulty)
+    
+    def _get_llm_semaphore(self) -> asyncio.Semaphore:
+        """Shared semaphore bounding concurrent LLM requests."""
+        if self._llm_semaphore is None:
+            self._llm_semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._llm_semaphore
+    
+    async def _request_llm_json(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 500,
+        n: int = 1
+    ) -> List[Dict]:
+        """
+        Await a GPT-4 chat completion and parse the JSON body of each choice.
+        
+        Choices that aren't valid JSON are dropped. Transient failures (rate
+        limits, timeouts, connection errors, no parseable choice) are retried
+        with exponential backoff and raise once max_attempts is exhausted;
+        anything else (auth, bad request, unknown model) raises immediately.
+        """
+        if self._async_client is None:
+            self._async_client = _pooled_openai_client(self.api_key)
+        
+        retryable = _retryable_llm_errors()
+        last_error = None
+        
+        for attempt in range(self.max_attempts):
+            try:
+                async with self._get_llm_semaphore():
+                    response = await self._async_client.chat.completions.create(
+                        model="gpt-4",
+                        messages=messages,
+                        temperature=0.8,
+                        max_tokens=max_tokens,
+                        n=n
+                    )
+                
+                results = []
+                for choice in response.choices:
+                    try:
+                        results.append(_parse_llm_json(choice.message.content))
+                    except ValueError:
+                        continue
+                
+                if not results:
+                    raise ValueError("no parseable JSON in LLM response")
+                
+                return results
+                
+            except retryable as e:
+                last_error = e
+                if attempt < self.max_attempts - 1:
+                    # Exponential backoff with jitter: ~0.5s, 1s, 2s, 4s
+                    await asyncio.sleep(0.5 * 2 ** attempt + self._rng.random() * 0.1)
+        
+        raise RuntimeError(f"{self.max_attempts} attempts failed, last error: {last_error}") from last_error
+    
+    async def _generate_with_llm(
+        self,
+        concept: str,
+        misconception: Misconception,
+        difficulty: str
+    ) -> AdversarialQuestion:
+        """Generate adversarial question using GPT-4 without blocking the event loop."""
+        cached = self._get_cached_question(concept, misconception, difficulty)
+        if cached is not None:
+            return cached
+        
+        try:
+            results = await self._request_llm_json(
+                self._build_llm_messages(concept, misconception, difficulty)
             )
+            question = self._question_from_llm_result(concept, misconception, difficulty, results[0])
+            self._cache_question(concept, misconception, difficulty, question)
             
+            return question
         except Exception as e:
-            print(f"LLM generation failed: {e}, using template")
+            logger.warning("LLM generation failed: %s, using template", e)
             return self._generate_with_template(concept, misconception, difficulty)
     
+    async def _generate_with_llm_batch(
+        self,
+        items: List[Tuple[str, Misconception, str]]
+    ) -> List[AdversarialQuestion]:
+        """
+        Generate several questions from a single GPT-4 prompt (row marshaling).
+        
+        Amortizes request overhead across the batch; falls back to per-item
+        generation if the batched reply doesn't match the items, and to
+        templates if the request itself failed (non-retryable error or retries
+        exhausted), since per-item calls would fail the same way.
+        """
+        if len(items) == 1:
+            return [await self._generate_with_llm(*items[0])]
+        
+        try:
+            results = await self._request_llm_json(
+                self._build_llm_batch_messages(items),
+                max_tokens=500 * len(items)
+            )
+            generated = results[0]['questions']
+            if len(generated) != len(items):
+                raise ValueError(f"expected {len(items)} questions, got {len(generated)}")
+            
+            questions = []
+            for (concept, misconception, difficulty), q in zip(items, generated):
+                question = self._question_from_llm_result(concept, misconception, difficulty, q)
+                self._cache_question(concept, misconception, difficulty, question)
+                questions.append(question)
+            
+            return questions
+            
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Batched LLM response unusable: %s, generating per question", e)
+            return list(await asyncio.gather(*[
+                self._generate_with_llm(*item) for item in items
+            ]))
+        except Exception as e:
+            logger.warning("Batched LLM generation failed: %s, using templates", e)
+            return [self._generate_with_template(*item) for item in items]
+    
     def _generate_with_template(
         self,
         concept: str,
@@ -169,56 +678,12 @@ Output JSON format:
     ) -> AdversarialQuestion:
         """Generate from predefined challenging questions."""
         
-        templates = {
-            'recursion': {
-                'question': "What is the output of this recursive function?\n\n```python\ndef mystery(n):\n    if n <= 1:\n        return 1\n    return n + mystery(n-2)\n```\n\nFor mystery(5):",
-                'options': [
-                    "9 (correct: 5+3+1)",
-                    "15 (trap: thinking it's 5+4+3+2+1)",
-                    "6 (distractor)",
-                    "Error: infinite recursion (distractor)"
-                ],
-                'correct': 0,
-                'trap': 1,
-                'explanation': "The trap answer assumes all numbers are summed, but the function skips even numbers (n-2). Correct trace: 5 + mystery(3) → 5 + (3 + mystery(1)) → 5 + 3 + 1 = 9"
-            },
-            'loops': {
-                'question': "How many times does 'X' print?\n\n```python\nfor i in range(5):\n    if i % 2 == 0:\n        continue\n    print('X')\n```",
-                'options': [
-                    "2 (correct: only i=1 and i=3)",
-                    "5 (trap: forgetting continue skips)",
-                    "3 (trap: including i=0)",
-                    "0 (distractor)"
-                ],
-                'correct': 0,
-                'trap': 1,
-                'explanation': "The trap assumes all iterations print. But 'continue' skips even numbers (0,2,4). Only odd numbers (1,3) print, so 2 times."
-            },
-            'functions': {
-                'question': "What does this function return?\n\n```python\ndef transform(lst):\n    lst.append(99)\n    return lst\n\noriginal = [1, 2]\nresult = transform(original)\nprint(len(original))\n```",
-                'options': [
-                    "3 (correct: list mutated)",
-                    "2 (trap: thinking copy was made)",
-                    "Error (distractor)",
-                    "1 (distractor)"
-                ],
-                'correct': 0,
-                'trap': 1,
-                'explanation': "The trap assumes the function creates a copy. But lists are mutable and passed by reference, so 'original' is modified directly. Correct: len([1,2,99]) = 3"
-            }
-        }
-        
-        if concept in templates:
-            template = templates[concept]
-            return AdversarialQuestion(
-                question_id=f"adv_{concept}_{random.randint(1000, 9999)}",
-                concept=concept,
-                question_text=template['question'],
-                options=template['options'],
-                correct_answer=template['correct'],
-                trap_answer=template['trap'],
-                explanation=template['explanation'],
-                difficulty=difficulty,
+        payload = _template_payload(concept, difficulty)
+        if payload is not None:
+            # Template content is static and trusted, so skip re-validation
+            return AdversarialQuestion.model_construct(
+                **payload,
+                question_id=self._next_question_id(concept),
                 misconception_targeted=misconception.misconception_text
             )
         
@@ -278,23 +743,15 @@ Output JSON format:
         
         Uses error clustering to detect systematic misunderstandings.
         """
-        concept_misconceptions = [
-            m for m in self.misconceptions 
-            if m.concept == concept
-        ]
+        concept_misconceptions = self._by_concept.get(concept)
         
         if not concept_misconceptions:
-            # Generic misconception
-            return Misconception(
-                concept=concept,
-                misconception_text="Surface-level understanding without deep comprehension",
-                correct_understanding="Full conceptual understanding",
-                frequency=0.5
-            )
+            # Generic misconception (copy skips re-validating the model)
+            return self._generic_misconception.model_copy(update={'concept': concept})
         
-        # Simple heuristic: most common misconception
+        # Simple heuristic: most common misconception (index is pre-sorted)
         # In production: cluster errors to identify specific misconception
-        return sorted(concept_misconceptions, key=lambda m: -m.frequency)[0]
+        return concept_misconceptions[0]
     
     def _load_misconceptions(self) -> List[Misconception]:
         """Load database of common misconceptions."""
@@ -355,7 +812,46 @@ Output JSON format:
             misconception_targeted=misconception.misconception_text
         )
     
-    def create_challenge_mode(
+    def _gauntlet_specs(
+        self,
+        concepts: List[str],
+        n_questions: int
+    ) -> List[Tuple[str, List[Dict], str]]:
+        """(concept, student_errors, difficulty) specs following the gauntlet's difficulty progression."""
+        return [
+            (concept, [], diff)
+            for concept, diff in zip(itertools.cycle(concepts), _GAUNTLET_SCHEDULE[:n_questions])
+        ]
+    
+    def _difficulty_stats(self, difficulties: Tuple[str, ...]) -> Tuple[int, Dict[str, int]]:
+        """Total XP and per-level counts for a sequence of question difficulties."""
+        codes = np.fromiter(
+            (_DIFFICULTY_CODES[d] for d in difficulties), dtype=np.int8, count=len(difficulties)
+        )
+        difficulty_counts = np.bincount(codes, minlength=len(_DIFFICULTY_LEVELS))
+        
+        if NUMBA_AVAILABLE:
+            total_xp = int(_total_xp(codes, self._xp_table))
+        else:
+            total_xp = int(difficulty_counts @ self._xp_table)
+        
+        return total_xp, dict(zip(_DIFFICULTY_LEVELS, difficulty_counts.tolist()))
+    
+    def _gauntlet_summary(self, n_questions: int) -> Dict:
+        """Gauntlet metadata (ids, XP, difficulty distribution) for an n-question gauntlet."""
+        total_possible_xp, distribution = self._gauntlet_stats[
+            max(0, min(n_questions, len(_GAUNTLET_SCHEDULE)))
+        ]
+        
+        return {
+            'challenge_id': f'gauntlet_{next(self._ids):04x}',
+            'title': '💥 Critical Thinking Gauntlet',
+            'description': 'Face progressively harder questions targeting common misconceptions. Build resilient understanding!',
+            'total_xp': total_possible_xp,
+            'difficulty_distribution': dict(distribution)
+        }
+    
+    async def create_challenge_mode_async(
         self,
         concepts: List[str],
         n_questions: int = 5
@@ -363,30 +859,51 @@ Output JSON format:
         """
         Create a gauntlet of adversarial challenges (gamified).
         
+        Questions are packed into batched prompts that run concurrently (bounded
+        by max_concurrency), so the gauntlet builds in ~max(LLM latency) rather
+        than the sum and never blocks the event loop while waiting on the LLM.
+        
         Returns:
             challenge pack with difficulty progression
         """
-        difficulties = ['hard', 'hard', 'very_hard', 'very_hard', 'expert']
+        specs = self._gauntlet_specs(concepts, n_questions)
+        questions = await self.generate_adversarial_questions(specs)
         
-        questions = []
-        for concept, diff in zip(concepts * (n_questions // len(concepts) + 1), difficulties[:n_questions]):
-            q = self.generate_adversarial_question(concept, [], diff)
-            questions.append(q)
+        return {
+            **self._gauntlet_summary(len(specs)),
+            'questions': [q.model_dump() for q in questions]
+        }
+    
+    async def stream_challenge_mode_async(
+        self,
+        concepts: List[str],
+        n_questions: int = 5
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream a gauntlet: yields the metadata frame first, then each question
+        as soon as its LLM batch resolves (completion order, not gauntlet order).
+        Each question frame carries 'index', its position in the gauntlet, so
+        clients can slot it in place.
         
-        total_possible_xp = sum(self.difficulty_xp[q.difficulty] for q in questions)
+        Lets clients render progressively instead of waiting on the slowest batch.
+        """
+        specs = self._gauntlet_specs(concepts, n_questions)
         
-        return {
-            'challenge_id': f'gauntlet_{random.randint(1000, 9999)}',
-            'title': '💥 Critical Thinking Gauntlet',
-            'description': 'Face progressively harder questions targeting common misconceptions. Build resilient understanding!',
-            'questions': [q.dict() for q in questions],
-            'total_xp': total_possible_xp,
-            'difficulty_distribution': {
-                'hard': sum(1 for q in questions if q.difficulty == 'hard'),
-                'very_hard': sum(1 for q in questions if q.difficulty == 'very_hard'),
-                'expert': sum(1 for q in questions if q.difficulty == 'expert')
-            }
+        yield {
+            **self._gauntlet_summary(len(specs)),
+            'n_questions': len(specs)
         }
+        
+        async def batch_from(start: int) -> Tuple[int, List[AdversarialQuestion]]:
+            return start, await self.generate_adversarial_questions(
+                specs[start:start + self.llm_batch_size]
+            )
+        
+        pending = [batch_from(i) for i in range(0, len(specs), self.llm_batch_size)]
+        for next_batch in asyncio.as_completed(pending):
+            start, questions = await next_batch
+            for offset, q in enumerate(questions):
+                yield {**q.model_dump(), 'index': start + offset}
 
 
 # FastAPI Integration
@@ -401,12 +918,17 @@ async def generate_adversarial_question(
     student_errors: List[Dict] = [],
     difficulty: str = 'hard'
 ):
-    question = adv_system.generate_adversarial_question(
+    question = await adv_system.generate_adversarial_question_async(
         concept,
         student_errors,
         difficulty
     )
-    return question.dict()
+    return question.model_dump()
+
+@app.post("/adversarial_questions")
+async def generate_adversarial_questions(specs: List[Tuple[str, List[Dict], str]]):
+    questions = await adv_system.generate_adversarial_questions(specs)
+    return [q.model_dump() for q in questions]
 
 @app.post("/evaluate_adversarial")
 async def evaluate_adversarial_response(
@@ -418,7 +940,16 @@ async def evaluate_adversarial_response(
 
 @app.get("/challenge_gauntlet")
 async def create_challenge_gauntlet(concepts: List[str] = ['loops', 'recursion']):
-    challenge = adv_system.create_challenge_mode(concepts, n_questions=5)
+    challenge = await adv_system.create_challenge_mode_async(concepts, n_questions=5)
     return challenge
+
+@app.get("/challenge_gauntlet/stream")
+async def stream_challenge_gauntlet(concepts: List[str] = ['loops', 'recursion']):
+    # NDJSON: metadata frame first, then one question per line (with its gauntlet index) as each resolves
+    async def frames():
+        async for frame in adv_system.stream_challenge_mode_async(concepts, n_questions=5):
+            yield json.dumps(frame) + "\n"
+    
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
 """
 
@@ -7,31 +7,79 @@ Integrates:
 - Resource ranking
 - Content intelligence
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
-import json
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, List, Optional, Tuple
+from typing_extensions import NotRequired, TypedDict
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import logging
+import logging.handlers
+import queue
+import secrets
+import time
 from pathlib import Path
 import os
 
+import numpy as np
+import orjson
+
 from models.dkt import DKTPredictor
 from models.beta_kt import BetaKT
 from rag_explainer import RAGExplainer
 from resource_ranker import ResourceRanker, UserProfile, Resource
 from explainer_service import ExplanationGenerator
 from evidence_tracker import EvidenceTracker
+from micro_batcher import DynamicBatcher
+from response_cache import cached_endpoint, clear_endpoint_caches, endpoint_caches
 from collaboration_service import (
     add_collaboration_routes,
     GroupQuizRequest, FacilitationRequest,
     RoleAssignmentRequest, SummaryRequest
 )
 
+class NumpyORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also serializes numpy arrays/scalars natively."""
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+logger = logging.getLogger("learnpath")
+log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging():
+    """
+    Route the service logger through a QueueHandler so request handlers only
+    enqueue records; a QueueListener thread does the actual stream writes.
+    """
+    global log_listener
+    if log_listener is not None:
+        return
+    
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(os.getenv('AI_SERVICE_LOG_LEVEL', 'INFO'))
+    logger.propagate = False
+    
+    log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    log_listener.start()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="LearnPath AI - Knowledge Tracing & Recommendation Service",
     version="2.0.0",
-    description="Advanced AI service with DKT, RAG explanations, and hybrid ranking"
+    description="Advanced AI service with DKT, RAG explanations, and hybrid ranking",
+    default_response_class=NumpyORJSONResponse
 )
 
 # CORS middleware
@@ -45,6 +93,7 @@ app.add_middleware(
 
 # Global state (loaded on startup)
 dkt_predictor: Optional[DKTPredictor] = None
+dkt_batcher: Optional[DynamicBatcher] = None  # coalesces concurrent DKT requests into one forward pass
 beta_kt: BetaKT = BetaKT()
 rag_explainer: Optional[RAGExplainer] = None
 resource_ranker: Optional[ResourceRanker] = None
@@ -52,19 +101,55 @@ explainer: ExplanationGenerator = ExplanationGenerator(use_llm=False)
 evidence_tracker: EvidenceTracker = EvidenceTracker()
 knowledge_graph: Dict = {}
 resources_db: List[Dict] = []
+resources_db_by_id: Dict[str, Dict] = {}
+resource_by_id: Dict[str, Resource] = {}  # pre-embedded Resource objects
+resources_by_concept: Dict[str, List[Resource]] = {}  # inverted index over resource_by_id
+resource_rebuild_lock = asyncio.Lock()  # one /admin/invalidate_resources rebuild at a time
+content_pipeline = None  # ContentIntelligencePipeline, loaded once on startup
 
 
 # Pydantic models
-class Attempt(BaseModel):
-    """Single attempt record."""
+class Attempt(TypedDict):
+    """
+    Single attempt record.
+    
+    A TypedDict rather than a BaseModel: pydantic validates it straight into
+    a plain dict, skipping a model instance per attempt (validating long
+    attempt lists is ~5x cheaper).
+    """
     concept: str
     correct: bool
-    question_id: Optional[int] = None
-    timestamp: Optional[str] = None
+    question_id: NotRequired[Optional[int]]
+    timestamp: NotRequired[Optional[str]]
+
+
+def attempts_to_arrays(attempts: List[Attempt]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convert attempts once into parallel arrays shared by the Beta and DKT paths.
+    
+    Returns:
+        (concepts, correct, question_ids); attempts without a question id get -1
+    """
+    n = len(attempts)
+    concepts = np.array([att['concept'] for att in attempts], dtype=np.str_)
+    correct = np.fromiter((att['correct'] for att in attempts), dtype=np.bool_, count=n)
+    question_ids = np.fromiter(
+        (-1 if att.get('question_id') is None else att['question_id'] for att in attempts),
+        dtype=np.int64, count=n
+    )
+    return concepts, correct, question_ids
+
+
+def dkt_inputs(correct: np.ndarray, question_ids: np.ndarray) -> np.ndarray:
+    """DKT-encoded sequence (question_id * 2 + correct) over attempts that have a question id."""
+    has_qid = question_ids >= 0
+    return question_ids[has_qid] * 2 + correct[has_qid]
 
 
 class MasteryRequest(BaseModel):
     """Request for mastery prediction."""
+    model_config = ConfigDict(frozen=True)  # shared with the batcher and response cache
+    
     user_id: str
     recent_attempts: List[Attempt] = Field(default_factory=list)
     prior_mastery: Dict[str, float] = Field(default_factory=dict)
@@ -141,6 +226,8 @@ class EvidencePanelRequest(BaseModel):
 
 class EnsemblePredictionRequest(BaseModel):
     """Request for ensemble KT prediction."""
+    model_config = ConfigDict(frozen=True)  # shared with the batcher and response cache
+    
     user_id: str
     recent_attempts: List[Attempt]
     prior_mastery: Dict[str, float] = Field(default_factory=dict)
@@ -150,16 +237,22 @@ class EnsemblePredictionRequest(BaseModel):
 @app.on_event("startup")
 async def load_models():
     """Load models and data on startup."""
-    global dkt_predictor, rag_explainer, resource_ranker, knowledge_graph, resources_db
+    global dkt_predictor, dkt_batcher, rag_explainer, resource_ranker, content_pipeline, knowledge_graph, resources_db
+    
+    configure_logging()
+    logger.info("Loading models and data...")
     
-    print("Loading models and data...")
+    # The default executor runs every blocking call: asyncio.to_thread in the
+    # endpoints, the DKT batcher and concurrent RAG explanations
+    # (cores + 4 headroom for threads parked on LLM round trips)
+    n_threads = int(os.getenv('AI_SERVICE_THREADS', min(32, (os.cpu_count() or 1) + 4)))
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=n_threads))
     
     # Load knowledge graph
     kg_path = Path(__file__).parent.parent / "backend" / "data" / "knowledge_graph.json"
     if kg_path.exists():
-        with open(kg_path) as f:
-            knowledge_graph = json.load(f)
-        print(f"Loaded knowledge graph with {len(knowledge_graph)} concepts")
+        knowledge_graph = orjson.loads(kg_path.read_bytes())
+        logger.info("Loaded knowledge graph with %d concepts", len(knowledge_graph))
     
     # Load DKT model (if available)
     dkt_model_path = Path(__file__).parent / "models" / "dkt_model.pt"
@@ -173,14 +266,24 @@ async def load_models():
             
             dkt_predictor = DKTPredictor(
                 model_path=str(dkt_model_path),
-                concept_to_questions=concept_to_questions
+                concept_to_questions=concept_to_questions,
+                precision=os.getenv('DKT_PRECISION', 'auto')
             )
-            print("DKT model loaded successfully")
+            if os.getenv('DKT_COMPILE', '1') == '1':
+                logger.info("DKT inference backend: %s", dkt_predictor.compile())
+            dkt_batcher = DynamicBatcher(
+                dkt_predictor.predict_mastery_batch,
+                max_batch_size=int(os.getenv('DKT_BATCH_SIZE', '32')),
+                max_wait_ms=float(os.getenv('DKT_BATCH_TIMEOUT_MS', '8'))
+            )
+            dkt_batcher.start()
+            logger.info("DKT model loaded successfully")
         except Exception as e:
-            print(f"Failed to load DKT model: {e}")
+            logger.exception("Failed to load DKT model: %s", e)
             dkt_predictor = None
+            dkt_batcher = None
     else:
-        print("DKT model not found, using Beta fallback only")
+        logger.info("DKT model not found, using Beta fallback only")
     
     # Load RAG explainer
     try:
@@ -202,20 +305,126 @@ async def load_models():
             resource_metadata=mock_resources,
             openai_api_key=os.getenv('OPENAI_API_KEY')
         )
-        print("RAG explainer initialized")
+        logger.info("RAG explainer initialized")
     except Exception as e:
-        print(f"Failed to initialize RAG explainer: {e}")
+        logger.warning("Failed to initialize RAG explainer: %s", e)
         rag_explainer = None
     
     # Initialize resource ranker
     try:
         resource_ranker = ResourceRanker()
-        print("Resource ranker initialized")
+        logger.info("Resource ranker initialized")
     except Exception as e:
-        print(f"Failed to initialize resource ranker: {e}")
+        logger.warning("Failed to initialize resource ranker: %s", e)
         resource_ranker = None
     
-    print("Startup complete!")
+    # Load content intelligence pipeline (Whisper + concept extraction) once
+    try:
+        from content_intelligence import ContentIntelligencePipeline
+        content_pipeline = ContentIntelligencePipeline()
+        logger.info("Content intelligence pipeline initialized")
+    except Exception as e:
+        logger.warning("Content intelligence not available: %s", e)
+        content_pipeline = None
+    
+    # Embed and index all resources once; /recommend only does similarity math
+    rebuild_resource_indexes()
+    logger.info("Indexed %d resources over %d concepts", len(resource_by_id), len(resources_by_concept))
+    
+    if os.getenv('AI_SERVICE_WARMUP', '1') == '1':
+        warm_up_models()
+    
+    logger.info("Startup complete!")
+
+
+def warm_up_models():
+    """
+    Run one dummy pass through each loaded model so lazy initialization
+    (kernel selection, compilation, first-call allocations) happens before
+    traffic arrives. Failures are logged and never block startup.
+    """
+    steps = []
+    if dkt_predictor is not None:
+        steps.append(("dkt", lambda: dkt_predictor.predict_mastery_batch(
+            [[{'question_id': 0, 'correct': True}], [{'question_id': 0, 'correct': False}] * 2]
+        )))
+    if resource_ranker is not None and resources_by_concept:
+        concept, candidates = next(iter(resources_by_concept.items()))
+        steps.append(("ranker", lambda: resource_ranker.rank_and_filter(
+            user=UserProfile(mastery={concept: 0.5}), concept=concept, resources=candidates, top_k=1
+        )))
+    if rag_explainer is not None:
+        # Retrieval only: no LLM call, no explanation-cache entry
+        steps.append(("rag", lambda: rag_explainer.doc_store.search("warm up retrieval", top_k=1)))
+    if content_pipeline is not None and content_pipeline.concept_extractor is not None:
+        steps.append(("content", lambda: content_pipeline.concept_extractor.extract_concepts(
+            "Warm up the concept extractor with one sentence."
+        )))
+    
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+            logger.info("Warm-up %s: %.1f ms", name, (time.perf_counter() - start) * 1000)
+        except Exception as e:
+            logger.warning("Warm-up %s failed: %s", name, e)
+
+
+@app.on_event("shutdown")
+async def shutdown_models():
+    """Stop background workers."""
+    if dkt_batcher is not None:
+        await dkt_batcher.stop()
+    if log_listener is not None:
+        log_listener.stop()
+
+
+def build_resource_indexes() -> Tuple[Dict[str, Dict], Dict[str, Resource], Dict[str, List[Resource]]]:
+    """
+    Build the id and concept lookups (with embeddings) from resources_db.
+    Blocking (embeds every resource); touches no module globals.
+    """
+    resource_objs = [
+        Resource(
+            id=res['id'],
+            title=res['title'],
+            description=res.get('description', ''),
+            concepts=res.get('concepts', []),
+            modality=res.get('modality', 'video'),
+            difficulty=res.get('difficulty', 'beginner')
+        )
+        for res in resources_db
+    ]
+    
+    by_concept = defaultdict(list)
+    for res in resource_objs:
+        for concept in res.concepts:
+            by_concept[concept].append(res)
+    
+    if resource_ranker:
+        resource_ranker.embed_resources(resource_objs)
+        resource_ranker.embed_queries(by_concept.keys())
+        resource_ranker.build_index(resource_objs)
+    
+    # First occurrence wins, matching the previous linear scan
+    db_by_id = {}
+    for res in resources_db:
+        db_by_id.setdefault(res['id'], res)
+    return db_by_id, {res.id: res for res in resource_objs}, dict(by_concept)
+
+
+def install_resource_indexes(indexes):
+    """
+    Swap in lookups from build_resource_indexes. Call on the event loop:
+    handlers read these globals there, so they never see a partial swap.
+    """
+    global resources_db_by_id, resource_by_id, resources_by_concept
+    resources_db_by_id, resource_by_id, resources_by_concept = indexes
+
+
+def rebuild_resource_indexes():
+    """Rebuild and install the resource lookups in one blocking call (startup)."""
+    install_resource_indexes(build_resource_indexes())
 
 
 # Endpoints
@@ -230,30 +439,28 @@ async def root():
             "dkt": dkt_predictor is not None,
             "beta_kt": True,
             "rag": rag_explainer is not None,
-            "ranker": resource_ranker is not None
+            "ranker": resource_ranker is not None,
+            "content_intelligence": content_pipeline is not None
         }
     }
 
 
 @app.post("/predict_mastery", response_model=MasteryResponse)
+@cached_endpoint(ttl=60)
 async def predict_mastery(req: MasteryRequest):
     """
     Predict per-concept mastery using DKT (with Beta fallback).
     """
+    concepts, correct, question_ids = attempts_to_arrays(req.recent_attempts)
+    
     # Try DKT first if available and requested
     if req.use_dkt and dkt_predictor is not None and req.recent_attempts:
         try:
-            # Convert attempts to DKT format
-            dkt_attempts = []
-            for att in req.recent_attempts:
-                if att.question_id is not None:
-                    dkt_attempts.append({
-                        'question_id': att.question_id,
-                        'correct': att.correct
-                    })
+            encoded = dkt_inputs(correct, question_ids)
             
-            if dkt_attempts:
-                mastery = dkt_predictor.predict_mastery(dkt_attempts)
+            if len(encoded):
+                # Micro-batched with other in-flight requests
+                mastery = await dkt_batcher.submit(encoded)
                 
                 # Merge with prior mastery for concepts not in recent attempts
                 for concept, prior in req.prior_mastery.items():
@@ -266,16 +473,12 @@ async def predict_mastery(req: MasteryRequest):
                     confidence=0.85  # DKT confidence (could compute from model uncertainty)
                 )
         except Exception as e:
-            print(f"DKT prediction failed: {e}, falling back to Beta")
+            logger.warning("DKT prediction failed: %s, falling back to Beta", e)
     
     # Fallback to Beta-Bernoulli
-    attempts_for_beta = [
-        {'concept': att.concept, 'correct': att.correct}
-        for att in req.recent_attempts
-    ]
-    
-    mastery = beta_kt.predict_mastery(
-        attempts=attempts_for_beta,
+    mastery = beta_kt.predict_mastery_arrays(
+        concepts=concepts,
+        correct=correct,
         prior_mastery=req.prior_mastery
     )
     
@@ -287,6 +490,7 @@ async def predict_mastery(req: MasteryRequest):
 
 
 @app.post("/recommend", response_model=RecommendationResponse)
+@cached_endpoint(ttl=600)
 async def recommend_resources(req: RecommendationRequest):
     """
     Recommend and rank resources for a concept.
@@ -294,41 +498,24 @@ async def recommend_resources(req: RecommendationRequest):
     if not resource_ranker or not resources_db:
         raise HTTPException(status_code=503, detail="Resource ranker not available")
     
-    # Filter resources by concept
-    candidate_resources = [
-        res for res in resources_db
-        if req.concept in res.get('concepts', [])
-    ]
+    # Look up pre-embedded candidates for the concept
+    resource_objs = resources_by_concept.get(req.concept, [])
     
-    if not candidate_resources:
+    if not resource_objs:
         return RecommendationResponse(
             recommendations=[],
             explanations=[]
         )
     
-    # Convert to Resource objects
-    resource_objs = []
-    for res in candidate_resources:
-        resource_objs.append(Resource(
-            id=res['id'],
-            title=res['title'],
-            description=res.get('description', ''),
-            concepts=res.get('concepts', []),
-            modality=res.get('modality', 'video'),
-            difficulty=res.get('difficulty', 'beginner')
-        ))
-    
-    # Embed resources
-    resource_ranker.embed_resources(resource_objs)
-    
     # Create user profile
     user_profile = UserProfile(
         preferred_modality=req.preferred_modality,
         mastery=req.mastery
     )
     
-    # Rank
-    ranked = resource_ranker.rank_and_filter(
+    # Rank (query embedding is a blocking model call)
+    ranked = await asyncio.to_thread(
+        resource_ranker.rank_and_filter,
         user=user_profile,
         concept=req.concept,
         resources=resource_objs,
@@ -350,23 +537,28 @@ async def recommend_resources(req: RecommendationRequest):
             'score': item['score'],
             'score_breakdown': item['score_breakdown']
         })
+    
+    # Generate explanations concurrently if requested
+    if req.explain and rag_explainer:
+        results = await rag_explainer.explain_batch([
+            {
+                'resource': {'id': rec['id'], 'title': rec['title'], 'description': rec['description']},
+                'student_mastery': req.mastery,
+                'concept': req.concept
+            }
+            for rec in recommendations
+        ])
         
-        # Generate explanation if requested
-        if req.explain and rag_explainer:
-            try:
-                explanation = rag_explainer.explain(
-                    resource={'id': res.id, 'title': res.title, 'description': res.description},
-                    student_mastery=req.mastery,
-                    concept=req.concept
-                )
-                explanations.append(explanation)
-            except Exception as e:
-                print(f"Explanation generation failed: {e}")
+        for explanation in results:
+            if isinstance(explanation, Exception):
+                logger.warning("Explanation generation failed: %s", explanation)
                 explanations.append({
                     'explanation': 'Explanation not available',
                     'action': 'Complete the resource',
                     'provenance': []
                 })
+            else:
+                explanations.append(explanation)
     
     return RecommendationResponse(
         recommendations=recommendations,
@@ -375,6 +567,7 @@ async def recommend_resources(req: RecommendationRequest):
 
 
 @app.post("/explain")
+@cached_endpoint(ttl=3600)
 async def explain_resource(req: ExplanationRequest):
     """
     Generate explanation for a specific resource recommendation.
@@ -383,13 +576,14 @@ async def explain_resource(req: ExplanationRequest):
         raise HTTPException(status_code=503, detail="RAG explainer not available")
     
     # Find resource
-    resource = next((r for r in resources_db if r['id'] == req.resource_id), None)
+    resource = resources_db_by_id.get(req.resource_id)
     
     if not resource:
         raise HTTPException(status_code=404, detail="Resource not found")
     
     try:
-        explanation = rag_explainer.explain(
+        explanation = await asyncio.to_thread(
+            rag_explainer.explain,
             resource=resource,
             student_mastery=req.student_mastery,
             concept=req.concept
@@ -404,25 +598,52 @@ async def analyze_content(req: ContentAnalysisRequest):
     """
     Analyze content (text or video) for concepts and difficulty.
     """
+    if content_pipeline is None:
+        raise HTTPException(status_code=503, detail="Content intelligence not available")
+    
+    if not req.text and not req.video_path:
+        raise HTTPException(status_code=400, detail="Provide either text or video_path")
+    
     try:
-        from content_intelligence import ContentIntelligencePipeline
-        
-        pipeline = ContentIntelligencePipeline()
-        
+        # Transcription / embedding are blocking model calls
         if req.text:
-            result = pipeline.process_text(req.text)
-        elif req.video_path:
-            result = pipeline.process_video(req.video_path)
-        else:
-            raise HTTPException(status_code=400, detail="Provide either text or video_path")
-        
-        return result
+            return await asyncio.to_thread(content_pipeline.process_text, req.text)
+        return await asyncio.to_thread(content_pipeline.process_video, req.video_path)
     except ImportError as e:
         raise HTTPException(status_code=503, detail=f"Content intelligence not available: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """
+    Admin endpoints need X-Admin-Token to match AI_SERVICE_ADMIN_TOKEN;
+    with no token configured they are disabled.
+    """
+    expected = os.getenv('AI_SERVICE_ADMIN_TOKEN')
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints disabled (AI_SERVICE_ADMIN_TOKEN not set)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/admin/invalidate_resources", dependencies=[Depends(require_admin_token)])
+async def invalidate_resources():
+    """Rebuild the embedded resource indexes after resources_db changes."""
+    async with resource_rebuild_lock:
+        # Embedding runs off the loop; the swap itself happens back on it
+        indexes = await asyncio.to_thread(build_resource_indexes)
+        install_resource_indexes(indexes)
+        clear_endpoint_caches()
+    return {"status": "ok", "n_resources": len(resource_by_id)}
+
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Response cache size and hit rate per endpoint."""
+    return {name: cache.stats() for name, cache in endpoint_caches.items()}
+
+
 @app.get("/knowledge_graph")
 async def get_knowledge_graph():
     """Get the knowledge graph."""
@@ -447,7 +668,7 @@ async def get_stats():
 
 
 @app.post("/explain/why_this")
-async def explain_why_this(req: WhyThisRequest):
+async def explain_why_this(req: WhyThisRequest, background_tasks: BackgroundTasks):
     """
     Generate 'Why this?' explanation for a recommended resource.
     Returns explainable reasoning with evidence and citations.
@@ -455,7 +676,7 @@ async def explain_why_this(req: WhyThisRequest):
     # Convert attempts to evidence format
     evidence = {
         "recent_attempts": [
-            {"correct": att.correct, "concept": att.concept, "timestamp": att.timestamp}
+            {"correct": att['correct'], "concept": att['concept'], "timestamp": att.get('timestamp')}
             for att in req.recent_attempts
         ]
     }
@@ -469,12 +690,14 @@ async def explain_why_this(req: WhyThisRequest):
         transcript_excerpt=req.transcript_excerpt
     )
     
-    # Record decision for audit trail
+    # Record decision for audit trail (after the response is sent)
     decision_id = f"rec_{req.resource_id}_{req.concept}"
-    evidence_tracker.record_decision(
+    background_tasks.add_task(
+        evidence_tracker.record_decision,
         decision_id=decision_id,
         decision_type="recommendation",
-        learner_id=f"learner_{hash(req.resource_id) % 10000}",  # Demo anonymization
+        # Demo anonymization (deterministic across restarts, unlike hash())
+        learner_id="learner_" + hashlib.blake2b(req.resource_id.encode(), digest_size=6).hexdigest(),
         inputs={
             "resource_id": req.resource_id,
             "concept": req.concept,
@@ -492,6 +715,7 @@ async def explain_why_this(req: WhyThisRequest):
 
 
 @app.post("/explain/path_decision")
+@cached_endpoint(ttl=3600)
 async def explain_path_decision(req: PathDecisionRequest):
     """
     Explain why the path algorithm chose the next concept.
@@ -507,12 +731,13 @@ async def explain_path_decision(req: PathDecisionRequest):
 
 
 @app.post("/explain/kt_prediction")
+@cached_endpoint(ttl=3600)
 async def explain_kt_prediction(req: KTPredictionExplanationRequest):
     """
     Explain a knowledge tracing prediction update.
     """
     evidence = [
-        {"correct": att.correct, "concept": att.concept, "timestamp": att.timestamp}
+        {"correct": att['correct'], "concept": att['concept'], "timestamp": att.get('timestamp')}
         for att in req.recent_attempts
     ]
     
@@ -580,14 +805,12 @@ async def predict_mastery_ensemble(req: EnsemblePredictionRequest):
     Predict mastery using ensemble of Beta + DKT models.
     Returns predictions from both models and a blended score.
     """
-    # Get Beta prediction
-    beta_attempts = [
-        {'concept': att.concept, 'correct': att.correct}
-        for att in req.recent_attempts
-    ]
+    concepts, correct, question_ids = attempts_to_arrays(req.recent_attempts)
     
-    beta_mastery = beta_kt.predict_mastery(
-        attempts=beta_attempts,
+    # Get Beta prediction
+    beta_mastery = beta_kt.predict_mastery_arrays(
+        concepts=concepts,
+        correct=correct,
         prior_mastery=req.prior_mastery
     )
     
@@ -595,33 +818,28 @@ async def predict_mastery_ensemble(req: EnsemblePredictionRequest):
     dkt_mastery = {}
     if dkt_predictor is not None and req.recent_attempts:
         try:
-            dkt_attempts = []
-            for att in req.recent_attempts:
-                if att.question_id is not None:
-                    dkt_attempts.append({
-                        'question_id': att.question_id,
-                        'correct': att.correct
-                    })
+            encoded = dkt_inputs(correct, question_ids)
             
-            if dkt_attempts:
-                dkt_mastery = dkt_predictor.predict_mastery(dkt_attempts)
+            if len(encoded):
+                # Shares the micro-batcher with /predict_mastery
+                dkt_mastery = await dkt_batcher.submit(encoded)
         except Exception as e:
-            print(f"DKT prediction failed: {e}")
+            logger.warning("DKT prediction failed: %s", e)
     
-    # Blend predictions (weighted average: 40% Beta, 60% DKT if available)
-    blended_mastery = {}
-    all_concepts = set(beta_mastery.keys()) | set(dkt_mastery.keys())
+    # Blend predictions (weighted average: 40% Beta, 60% DKT if available), vectorized over concepts
+    all_concepts = sorted({**beta_mastery, **dkt_mastery})  # single hash-table merge
+    n_concepts = len(all_concepts)
     
-    for concept in all_concepts:
-        beta_val = beta_mastery.get(concept, req.prior_mastery.get(concept, 0.5))
-        dkt_val = dkt_mastery.get(concept, beta_val)
-        
-        if concept in dkt_mastery:
-            # Both models available - blend
-            blended_mastery[concept] = 0.4 * beta_val + 0.6 * dkt_val
-        else:
-            # Only Beta available
-            blended_mastery[concept] = beta_val
+    beta_arr = np.fromiter(
+        (beta_mastery.get(c, req.prior_mastery.get(c, 0.5)) for c in all_concepts),
+        dtype=np.float64, count=n_concepts
+    )
+    has_dkt = np.fromiter((c in dkt_mastery for c in all_concepts), dtype=bool, count=n_concepts)
+    dkt_arr = np.fromiter((dkt_mastery.get(c, 0.0) for c in all_concepts), dtype=np.float64, count=n_concepts)
+    
+    # Both models available -> blend; only Beta available -> Beta
+    blended = np.where(has_dkt, 0.4 * beta_arr + 0.6 * dkt_arr, beta_arr)
+    blended_mastery = dict(zip(all_concepts, blended.tolist()))
     
     return {
         "beta_prediction": beta_mastery,
@@ -653,14 +871,24 @@ async def get_learner_history(learner_id: str, limit: int = 20):
 add_collaboration_routes(app)
 
 
-# Development server
+# Server
 if __name__ == "__main__":
     import uvicorn
+    
+    # AI_SERVICE_RELOAD=1 for single-process auto-reload during development.
+    # One worker by default: evidence records, response caches and resource
+    # indexes live in process memory and are not shared between workers.
+    reload = os.getenv('AI_SERVICE_RELOAD', '0') == '1'
     uvicorn.run(
         "app:app",
         host="0.0.0.0",
         port=8001,
-        reload=True,
+        reload=reload,
+        workers=1 if reload else int(os.getenv('AI_SERVICE_WORKERS', '1')),
+        loop="uvloop",
+        http="httptools",
+        access_log=reload,  # per-request access log formatting only in development
+        proxy_headers=True,
         log_level="info"
     )
 
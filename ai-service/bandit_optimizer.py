@@ -2,16 +2,72 @@
 Multi-Armed Bandit Optimization for Resource Selection
 Implements Thompson Sampling and UCB algorithms
 """
+import math
+from functools import lru_cache
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 from dataclasses import dataclass, field
-from scipy.stats import beta as beta_dist
-import json
+from scipy.special import betaincinv
+import orjson
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
-@dataclass
+
+@lru_cache(maxsize=8192)
+def _beta_ci(alpha_post: float, beta_post: float) -> Tuple[float, float]:
+    """95% credible interval of Beta(alpha_post, beta_post); keyed on the posterior, so never stale"""
+    return (float(betaincinv(alpha_post, beta_post, 0.025)),
+            float(betaincinv(alpha_post, beta_post, 0.975)))
+
+
+def _thompson_argmax(alpha_post: np.ndarray, beta_post: np.ndarray, idx: np.ndarray) -> int:
+    """Position in idx of the highest Beta posterior draw (sampling fused with the argmax)."""
+    best_sample = -1.0
+    best = 0
+    for i in range(idx.shape[0]):
+        j = idx[i]
+        sample = np.random.beta(alpha_post[j], beta_post[j])
+        if sample > best_sample:
+            best_sample = sample
+            best = i
+    return best
+
+
+def _ucb_argmax(successes: np.ndarray, pulls: np.ndarray, idx: np.ndarray,
+                log_total: float, c: float) -> int:
+    """Position in idx of the first unpulled arm, else of the highest UCB score."""
+    best_score = -np.inf
+    best = 0
+    for i in range(idx.shape[0]):
+        j = idx[i]
+        if pulls[j] == 0:
+            return i
+        score = successes[j] / pulls[j] + c * math.sqrt(log_total / pulls[j])
+        if score > best_score:
+            best_score = score
+            best = i
+    return best
+
+
+if NUMBA_AVAILABLE:
+    # Compiled once and cached to __pycache__, so later processes skip the JIT.
+    # _thompson_argmax draws from Numba's own per-thread generator rather than the bandit's Generator
+    _thompson_argmax = njit(cache=True)(_thompson_argmax)
+    _ucb_argmax = njit(cache=True)(_ucb_argmax)
+
+
+@dataclass(slots=True)
 class Resource:
-    """Learning resource representation"""
+    """
+    Learning resource representation (slotted: no per-instance __dict__)
+    
+    Bandit statistics live in the owning bandit's arrays; successes, failures
+    and pulls are read-only views of them (0 until the resource is added).
+    """
     id: str
     title: str
     type: str  # 'video', 'article', 'quiz', 'interactive'
@@ -22,33 +78,168 @@ class Resource:
     completion_rate: float = 0.5
     avg_time_minutes: float = 10.0
     
-    # Bandit statistics
-    successes: int = 0  # Number of times resource led to mastery gain
-    failures: int = 0   # Number of times resource didn't help
-    pulls: int = 0      # Number of times resource was shown
+    # Bandit this resource was last added to (set by add_resource)
+    _bandit: Optional["MultiArmedBandit"] = field(default=None, init=False, repr=False, compare=False)
+    
+    def _stat(self, name: str) -> int:
+        """Statistic from the owning bandit's array `name`"""
+        bandit = self._bandit
+        i = bandit._idx.get(self.id) if bandit is not None else None
+        return 0 if i is None else int(getattr(bandit, name)[i])
+    
+    @property
+    def successes(self) -> int:
+        """Times resource led to mastery gain"""
+        return self._stat('_succ')
+    
+    @property
+    def failures(self) -> int:
+        """Times resource didn't help"""
+        return self._stat('_fail')
+    
+    @property
+    def pulls(self) -> int:
+        """Times resource was shown"""
+        return self._stat('_pulls')
     
 
 class MultiArmedBandit:
     """
     Multi-Armed Bandit for optimal resource selection.
     Balances exploration (trying new resources) and exploitation (using proven resources).
+    
+    Resource metadata lives in `resources`; bandit statistics are kept as
+    parallel arrays (`_succ`, `_fail`, `_pulls`, plus the Beta posterior
+    parameters `_alpha_post`/`_beta_post`) indexed via `_idx`, so
+    selection works on contiguous memory instead of per-object attributes.
     """
     
-    def __init__(self, algorithm: str = "thompson", alpha: float = 1.0, beta: float = 1.0):
+    # Candidate count from which Thompson sampling prunes dominated arms first
+    _PRUNE_MIN_ARMS = 32
+    
+    def __init__(self, algorithm: str = "thompson", alpha: float = 1.0, beta: float = 1.0,
+                 seed: Optional[int] = None):
         """
         Args:
             algorithm: 'thompson' (Thompson Sampling) or 'ucb' (Upper Confidence Bound)
             alpha: Prior successes for Beta distribution
             beta: Prior failures for Beta distribution
+            seed: Seed for the bandit's random generator (None = fresh entropy)
         """
         self.algorithm = algorithm
         self.alpha = alpha
         self.beta = beta
         self.resources: Dict[str, Resource] = {}
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+        
+        # Bandit statistics (structure of arrays, first _n rows in use)
+        self._ids: List[str] = []
+        self._idx: Dict[str, int] = {}
+        self._n: int = 0
+        self._total_pulls: int = 0
+        self._succ: np.ndarray = np.zeros(16, dtype=np.int64)   # Times resource led to mastery gain
+        self._fail: np.ndarray = np.zeros(16, dtype=np.int64)   # Times resource didn't help
+        self._pulls: np.ndarray = np.zeros(16, dtype=np.int64)  # Times resource was shown
+        self._alpha_post: np.ndarray = np.zeros(16)             # alpha + successes
+        self._beta_post: np.ndarray = np.zeros(16)              # beta + failures
+        
+        # Resource embeddings as int8 codes with the codes' L2 norms
+        # (allocated on the first resource that has one)
+        self._emb: Optional[np.ndarray] = None
+        self._emb_norms: Optional[np.ndarray] = None
         
-    def add_resource(self, resource: Resource):
-        """Add a resource to the bandit pool"""
+    def add_resource(self, resource: Resource,
+                     successes: int = 0, failures: int = 0, pulls: int = 0):
+        """
+        Add a resource to the bandit pool
+        
+        Args:
+            resource: Resource metadata
+            successes, failures, pulls: Initial statistics (e.g. restored state)
+        """
         self.resources[resource.id] = resource
+        resource._bandit = self
+        
+        i = self._idx.get(resource.id)
+        if i is None:
+            i = self._n
+            if i == len(self._pulls):
+                # Grow geometrically so appends stay amortized O(1)
+                self._resize(2 * len(self._pulls))
+            self._ids.append(resource.id)
+            self._idx[resource.id] = i
+            self._n += 1
+        else:
+            # Re-added resource: its old pulls no longer count
+            self._total_pulls -= int(self._pulls[i])
+            
+        self._total_pulls += pulls
+        self._succ[i] = successes
+        self._fail[i] = failures
+        self._alpha_post[i] = self.alpha + successes
+        self._beta_post[i] = self.beta + failures
+        self._pulls[i] = pulls
+        
+        if len(resource.embedding):
+            if self._emb is None:
+                self._emb = np.zeros((len(self._pulls), len(resource.embedding)), dtype=np.int8)
+                self._emb_norms = np.zeros(len(self._pulls), dtype=np.float32)
+            self._emb[i] = quantize_int8(resource.embedding)
+            self._emb_norms[i] = np.linalg.norm(self._emb[i].astype(np.float32))
+        elif self._emb is not None:
+            self._emb[i] = 0.0
+            self._emb_norms[i] = 0.0
+        
+    def _resize(self, capacity: int):
+        """Resize the per-resource arrays to capacity rows"""
+        self._succ = np.resize(self._succ, capacity)
+        self._fail = np.resize(self._fail, capacity)
+        self._alpha_post = np.resize(self._alpha_post, capacity)
+        self._beta_post = np.resize(self._beta_post, capacity)
+        self._pulls = np.resize(self._pulls, capacity)
+        
+        if self._emb is not None:
+            emb = np.zeros((capacity, self._emb.shape[1]), dtype=self._emb.dtype)
+            emb[:self._n] = self._emb[:self._n]
+            self._emb = emb
+            self._emb_norms = np.resize(self._emb_norms, capacity)
+            
+    def embedding_similarity(self,
+                             query: List[float],
+                             candidates: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Cosine similarity between a query embedding and resource embeddings
+        
+        Args:
+            query: Query embedding
+            candidates: Resource IDs to score (default: all resources)
+            
+        Returns:
+            Dict of resource ID -> similarity (0 for resources without an embedding)
+        """
+        if candidates is None:
+            valid, idx = self._ids, np.arange(self._n)
+        else:
+            valid, idx = self._candidate_indices(candidates)
+            
+        if self._emb is None:
+            return dict.fromkeys(valid, 0.0)
+            
+        # Per-vector scales cancel in the cosine, so the int8 codes are compared directly
+        # (upcast to float32 so the matmul goes through BLAS; sums of int8 products stay exact)
+        sims = cosine_similarity_batch(
+            quantize_int8(query).astype(np.float32),
+            self._emb[idx].astype(np.float32),
+            self._emb_norms[idx]
+        )
+        return dict(zip(valid, sims.tolist()))
+        
+    def _candidate_indices(self, candidates: List[str]) -> Tuple[List[str], np.ndarray]:
+        """Known candidates and their statistics rows"""
+        valid = [c for c in candidates if c in self._idx]
+        idx = np.fromiter((self._idx[c] for c in valid), dtype=np.intp, count=len(valid))
+        return valid, idx
         
     def thompson_sampling(self, 
                          candidates: List[str],
@@ -67,27 +258,34 @@ class MultiArmedBandit:
         if not candidates:
             return None
             
-        best_resource = None
-        best_sample = -1
-        
-        for resource_id in candidates:
-            if resource_id not in self.resources:
-                continue
-                
-            resource = self.resources[resource_id]
-            
-            # Beta posterior parameters
-            alpha_post = self.alpha + resource.successes
-            beta_post = self.beta + resource.failures
+        valid, idx = self._candidate_indices(candidates)
+        if not valid:
+            return None
             
-            # Sample from Beta distribution
-            sample = np.random.beta(alpha_post, beta_post)
+        # Large pools: don't sample arms that practically can't beat the best posterior mean
+        if len(idx) >= self._PRUNE_MIN_ARMS:
+            keep = self._undominated(idx)
+            valid = [valid[k] for k in keep]
+            idx = idx[keep]
+        
+        # The Numba kernel draws from its own generator, so seeded bandits stay on self._rng
+        if NUMBA_AVAILABLE and self.seed is None:
+            return valid[_thompson_argmax(self._alpha_post, self._beta_post, idx)]
             
-            if sample > best_sample:
-                best_sample = sample
-                best_resource = resource_id
-                
-        return best_resource
+        # Sample every candidate's Beta posterior in one call
+        samples = self._rng.beta(self._alpha_post[idx], self._beta_post[idx])
+        
+        return valid[int(samples.argmax())]
+        
+    def _undominated(self, idx: np.ndarray) -> np.ndarray:
+        """Positions in idx whose posterior mean + 3 sd reaches the best posterior mean"""
+        alpha_post = self._alpha_post[idx]
+        beta_post = self._beta_post[idx]
+        total = alpha_post + beta_post
+        
+        means = alpha_post / total
+        stds = np.sqrt(alpha_post * beta_post / (total * total * (total + 1.0)))
+        return np.flatnonzero(means + 3.0 * stds >= means.max() - 1e-3)
         
     def ucb_selection(self, 
                      candidates: List[str],
@@ -108,33 +306,26 @@ class MultiArmedBandit:
         if not candidates:
             return None
             
-        best_resource = None
-        best_ucb = -np.inf
-        
-        for resource_id in candidates:
-            if resource_id not in self.resources:
-                continue
-                
-            resource = self.resources[resource_id]
+        valid, idx = self._candidate_indices(candidates)
+        if not valid:
+            return None
             
-            # Handle resources never pulled (infinite UCB)
-            if resource.pulls == 0:
-                return resource_id
-                
-            # Calculate mean reward
-            mean_reward = resource.successes / resource.pulls if resource.pulls > 0 else 0.5
+        log_total = math.log(max(total_pulls, 1))
+        if NUMBA_AVAILABLE:
+            return valid[_ucb_argmax(self._succ, self._pulls, idx, log_total, c)]
             
-            # UCB calculation
-            exploration_bonus = c * np.sqrt(
-                np.log(max(total_pulls, 1)) / resource.pulls
-            )
-            ucb_score = mean_reward + exploration_bonus
+        pulls = self._pulls[idx]
+        
+        # Handle resources never pulled (infinite UCB)
+        unpulled = np.flatnonzero(pulls == 0)
+        if len(unpulled):
+            return valid[int(unpulled[0])]
             
-            if ucb_score > best_ucb:
-                best_ucb = ucb_score
-                best_resource = resource_id
-                
-        return best_resource
+        # UCB for all candidates at once
+        mean_reward = self._succ[idx] / pulls
+        ucb_scores = mean_reward + c * np.sqrt(log_total / pulls)
+        
+        return valid[int(ucb_scores.argmax())]
         
     def select_resource(self, 
                        candidates: List[str],
@@ -153,11 +344,11 @@ class MultiArmedBandit:
             return self.thompson_sampling(candidates)
         elif self.algorithm == "ucb":
             if total_pulls is None:
-                total_pulls = sum(r.pulls for r in self.resources.values())
+                total_pulls = self._total_pulls
             return self.ucb_selection(candidates, total_pulls)
         else:
             # Fallback: random selection
-            return np.random.choice(candidates) if candidates else None
+            return candidates[int(self._rng.integers(len(candidates)))] if candidates else None
             
     def update_reward(self, resource_id: str, success: bool):
         """
@@ -167,52 +358,75 @@ class MultiArmedBandit:
             resource_id: ID of used resource
             success: Whether resource led to learning gain
         """
-        if resource_id not in self.resources:
+        i = self._idx.get(resource_id)
+        if i is None:
             return
             
-        resource = self.resources[resource_id]
-        resource.pulls += 1
+        self._pulls[i] += 1
+        self._total_pulls += 1
         
         if success:
-            resource.successes += 1
+            self._succ[i] += 1
+            self._alpha_post[i] += 1
         else:
-            resource.failures += 1
+            self._fail[i] += 1
+            self._beta_post[i] += 1
             
     def get_statistics(self, resource_id: str) -> Dict:
         """Get statistics for a resource"""
-        if resource_id not in self.resources:
+        i = self._idx.get(resource_id)
+        if i is None:
             return {}
             
-        resource = self.resources[resource_id]
+        successes = int(self._succ[i])
+        failures = int(self._fail[i])
+        pulls = int(self._pulls[i])
         
-        success_rate = (
-            resource.successes / resource.pulls 
-            if resource.pulls > 0 else 0.5
-        )
+        success_rate = successes / pulls if pulls > 0 else 0.5
         
         # Confidence interval (95%)
-        if resource.pulls > 0:
-            alpha_post = self.alpha + resource.successes
-            beta_post = self.beta + resource.failures
-            ci_low = beta_dist.ppf(0.025, alpha_post, beta_post)
-            ci_high = beta_dist.ppf(0.975, alpha_post, beta_post)
+        if pulls > 0:
+            ci_low, ci_high = _beta_ci(float(self._alpha_post[i]), float(self._beta_post[i]))
         else:
             ci_low, ci_high = 0.0, 1.0
             
         return {
             'resource_id': resource_id,
             'success_rate': success_rate,
-            'successes': resource.successes,
-            'failures': resource.failures,
-            'pulls': resource.pulls,
+            'successes': successes,
+            'failures': failures,
+            'pulls': pulls,
             'confidence_interval': (ci_low, ci_high)
         }
         
     def get_all_statistics(self) -> List[Dict]:
         """Get statistics for all resources"""
+        n = self._n
+        successes = self._succ[:n]
+        failures = self._fail[:n]
+        pulls = self._pulls[:n]
+        
+        # 95% confidence intervals for every resource in two calls
+        alpha_post = self._alpha_post[:n]
+        beta_post = self._beta_post[:n]
+        pulled = pulls > 0
+        ci_low = np.where(pulled, betaincinv(alpha_post, beta_post, 0.025), 0.0).tolist()
+        ci_high = np.where(pulled, betaincinv(alpha_post, beta_post, 0.975), 1.0).tolist()
+        success_rates = np.where(pulled, successes / np.maximum(pulls, 1), 0.5).tolist()
+        
         return [
-            self.get_statistics(resource_id)
-            for resource_id in self.resources.keys()
+            {
+                'resource_id': resource_id,
+                'success_rate': rate,
+                'successes': s,
+                'failures': f,
+                'pulls': p,
+                'confidence_interval': (lo, hi)
+            }
+            for resource_id, rate, s, f, p, lo, hi in zip(
+                self._ids, success_rates, successes.tolist(), failures.tolist(),
+                pulls.tolist(), ci_low, ci_high
+            )
         ]
         
     def export_state(self) -> Dict:
@@ -228,9 +442,9 @@ class MultiArmedBandit:
                     'type': r.type,
                     'concept': r.concept,
                     'difficulty': r.difficulty,
-                    'successes': r.successes,
-                    'failures': r.failures,
-                    'pulls': r.pulls,
+                    'successes': int(self._succ[self._idx[resource_id]]),
+                    'failures': int(self._fail[self._idx[resource_id]]),
+                    'pulls': int(self._pulls[self._idx[resource_id]]),
                     'engagement_score': r.engagement_score,
                     'completion_rate': r.completion_rate
                 }
@@ -255,14 +469,25 @@ class MultiArmedBandit:
                 concept=resource_data['concept'],
                 difficulty=resource_data['difficulty'],
                 engagement_score=resource_data.get('engagement_score', 0.5),
-                completion_rate=resource_data.get('completion_rate', 0.5),
+                completion_rate=resource_data.get('completion_rate', 0.5)
+            )
+            bandit.add_resource(
+                resource,
                 successes=resource_data.get('successes', 0),
                 failures=resource_data.get('failures', 0),
                 pulls=resource_data.get('pulls', 0)
             )
-            bandit.add_resource(resource)
             
         return bandit
+        
+    def dumps(self) -> bytes:
+        """Serialize bandit state to JSON bytes (orjson)"""
+        return orjson.dumps(self.export_state(), option=orjson.OPT_SERIALIZE_NUMPY)
+        
+    @classmethod
+    def loads(cls, data: bytes) -> 'MultiArmedBandit':
+        """Load bandit from JSON produced by dumps()"""
+        return cls.from_state(orjson.loads(data))
 
 
 class ContextualBandit(MultiArmedBandit):
@@ -271,6 +496,19 @@ class ContextualBandit(MultiArmedBandit):
     (mastery level, learning style, time of day) for better selection
     """
     
+    # Learning style x resource type match table; the last row/column
+    # (unknown style or type) scores a neutral 0.5
+    _STYLE_IDX = {'visual': 0, 'reading': 1, 'interactive': 2, 'hands-on': 3}
+    _TYPE_IDX = {'video': 0, 'article': 1, 'quiz': 2, 'interactive': 3}
+    _STYLE_MATCH = np.array([
+        # video article quiz interactive unknown
+        [1.0, 0.3, 0.5, 0.7, 0.5],  # visual
+        [0.4, 1.0, 0.7, 0.5, 0.5],  # reading
+        [0.6, 0.3, 0.9, 1.0, 0.5],  # interactive
+        [0.5, 0.3, 0.8, 1.0, 0.5],  # hands-on
+        [0.5, 0.5, 0.5, 0.5, 0.5],  # unknown
+    ])
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Context weights: how much to adjust based on context
@@ -281,6 +519,36 @@ class ContextualBandit(MultiArmedBandit):
             'difficulty_match': 0.4
         }
         
+        # Resource metadata used for context scoring, row-aligned with the statistics
+        capacity = len(self._pulls)
+        self._difficulty = np.zeros(capacity)
+        self._engagement = np.zeros(capacity)
+        self._avg_time = np.zeros(capacity)
+        self._type = np.zeros(capacity, dtype=np.intp)
+        
+        # Specialized scorers keyed by (candidates, style, weights); see _selector
+        self._selectors: Dict[Tuple, Tuple[List[str], Callable[[float, float], np.ndarray]]] = {}
+        
+    def add_resource(self, resource: Resource,
+                     successes: int = 0, failures: int = 0, pulls: int = 0):
+        """Add a resource and record its context-scoring metadata"""
+        super().add_resource(resource, successes, failures, pulls)
+        
+        i = self._idx[resource.id]
+        self._difficulty[i] = resource.difficulty
+        self._engagement[i] = resource.engagement_score
+        self._avg_time[i] = resource.avg_time_minutes
+        self._type[i] = self._TYPE_IDX.get(resource.type, 4)
+        self._selectors.clear()
+        
+    def _resize(self, capacity: int):
+        """Resize statistics and metadata arrays together"""
+        super()._resize(capacity)
+        self._difficulty = np.resize(self._difficulty, capacity)
+        self._engagement = np.resize(self._engagement, capacity)
+        self._avg_time = np.resize(self._avg_time, capacity)
+        self._type = np.resize(self._type, capacity)
+        
     def calculate_context_score(self,
                                 resource: Resource,
                                 learner_mastery: float,
@@ -298,35 +566,65 @@ class ContextualBandit(MultiArmedBandit):
         Returns:
             Context score (0-1)
         """
-        # Difficulty match: Optimal when resource slightly harder than mastery
-        optimal_difficulty = learner_mastery + 0.1
-        difficulty_match = 1.0 - abs(resource.difficulty - optimal_difficulty)
-        difficulty_match = max(0, min(1, difficulty_match))
-        
-        # Learning style match
-        style_map = {
-            'visual': {'video': 1.0, 'interactive': 0.7, 'article': 0.3, 'quiz': 0.5},
-            'reading': {'article': 1.0, 'quiz': 0.7, 'video': 0.4, 'interactive': 0.5},
-            'interactive': {'interactive': 1.0, 'quiz': 0.9, 'video': 0.6, 'article': 0.3},
-            'hands-on': {'interactive': 1.0, 'quiz': 0.8, 'video': 0.5, 'article': 0.3}
-        }
-        learning_style_match = style_map.get(learning_style, {}).get(resource.type, 0.5)
+        score = self._context_scores(
+            np.array([resource.difficulty]),
+            np.array([self._TYPE_IDX.get(resource.type, 4)]),
+            np.array([resource.avg_time_minutes]),
+            np.array([resource.engagement_score]),
+            learner_mastery, learning_style, available_time
+        )
+        return float(score[0])
         
-        # Time match
-        time_match = 1.0 if resource.avg_time_minutes <= available_time else 0.5
+    def _context_scores(self,
+                        difficulty: np.ndarray,
+                        type_codes: np.ndarray,
+                        avg_time: np.ndarray,
+                        engagement: np.ndarray,
+                        learner_mastery: float,
+                        learning_style: str,
+                        available_time: float) -> np.ndarray:
+        """Context scores for parallel arrays of resource attributes (branchless)"""
+        return (
+            self._static_context_scores(type_codes, engagement, learning_style) +
+            self._dynamic_context_scores(difficulty, avg_time, learner_mastery, available_time)
+        )
+        
+    def _static_context_scores(self,
+                               type_codes: np.ndarray,
+                               engagement: np.ndarray,
+                               learning_style: str) -> np.ndarray:
+        """Weighted context terms fixed per resource and learning style"""
+        weights = self.context_weights
+        
+        # Learning style match (style row picked once, gathered by type code)
+        learning_style_match = self._STYLE_MATCH[self._STYLE_IDX.get(learning_style, 4)][type_codes]
         
         # Mastery match (prefer resources that worked for similar mastery levels)
-        mastery_match = resource.engagement_score
-        
-        # Weighted combination
-        context_score = (
-            self.context_weights['difficulty_match'] * difficulty_match +
-            self.context_weights['learning_style_match'] * learning_style_match +
-            self.context_weights['time_preference'] * time_match +
-            self.context_weights['mastery_match'] * mastery_match
+        mastery_match = engagement
+        
+        return (
+            weights['learning_style_match'] * learning_style_match +
+            weights['mastery_match'] * mastery_match
         )
         
-        return context_score
+    def _dynamic_context_scores(self,
+                                difficulty: np.ndarray,
+                                avg_time: np.ndarray,
+                                learner_mastery: float,
+                                available_time: float) -> np.ndarray:
+        """Weighted context terms that depend on the learner's mastery and time"""
+        weights = self.context_weights
+        
+        # Difficulty match: Optimal when resource slightly harder than mastery
+        difficulty_match = np.clip(1.0 - np.abs(difficulty - (learner_mastery + 0.1)), 0.0, 1.0)
+        
+        # Time match
+        time_match = np.where(avg_time <= available_time, 1.0, 0.5)
+        
+        return (
+            weights['difficulty_match'] * difficulty_match +
+            weights['time_preference'] * time_match
+        )
         
     def select_contextual_resource(self,
                                    candidates: List[str],
@@ -342,53 +640,137 @@ class ContextualBandit(MultiArmedBandit):
         if not candidates:
             return None
             
-        # Get bandit scores
-        bandit_scores = {}
-        for resource_id in candidates:
-            if resource_id not in self.resources:
-                continue
-                
-            resource = self.resources[resource_id]
+        valid, score = self._selector(tuple(candidates), learning_style)
+        if not valid:
+            return None
             
-            # Thompson sampling score
-            alpha_post = self.alpha + resource.successes
-            beta_post = self.beta + resource.failures
-            bandit_score = np.random.beta(alpha_post, beta_post)
+        return valid[int(score(learner_mastery, available_time).argmax())]
+        
+    def select_top_k(self,
+                     candidates: List[str],
+                     k: int,
+                     learner_mastery: float,
+                     learning_style: str = "visual",
+                     available_time: float = 30.0) -> List[str]:
+        """
+        Select the k best resources for the learner context (same scoring as
+        select_contextual_resource, from one set of Beta draws)
+        
+        Returns:
+            Up to k resource IDs, best first
+        """
+        valid, score = self._selector(tuple(candidates), learning_style)
+        if not valid or k <= 0:
+            return []
             
-            # Context score
-            context_score = self.calculate_context_score(
-                resource, learner_mastery, learning_style, available_time
-            )
+        combined_scores = score(learner_mastery, available_time)
+        if k < len(valid):
+            # O(N) selection of the top k, then sort only those
+            top = np.argpartition(combined_scores, -k)[-k:]
+            top = top[np.argsort(-combined_scores[top])]
+        else:
+            top = np.argsort(-combined_scores)
             
-            # Combined score (weighted average)
-            combined_score = 0.6 * bandit_score + 0.4 * context_score
-            bandit_scores[resource_id] = combined_score
+        return [valid[i] for i in top]
+        
+    def _selector(self,
+                  candidates: Tuple[str, ...],
+                  learning_style: str) -> Tuple[List[str], Callable[[float, float], np.ndarray]]:
+        """
+        Known candidates and a combined-score function specialized for them
+        and the learning style.
+        
+        The candidate gather and the context terms that don't depend on the
+        request (style match, engagement) are computed once and reused until
+        a resource is added; posteriors are read live on every call.
+        """
+        weights = self.context_weights
+        key = (candidates, learning_style, tuple(weights.values()))
+        selector = self._selectors.get(key)
+        if selector is not None:
+            return selector
+            
+        valid, idx = self._candidate_indices(list(candidates))
+        
+        if not valid:
+            def score(learner_mastery: float, available_time: float) -> np.ndarray:
+                return np.empty(0)
+        else:
+            difficulty = self._difficulty[idx]
+            avg_time = self._avg_time[idx]
+            static_scores = self._static_context_scores(
+                self._type[idx], self._engagement[idx], learning_style
+            )
             
-        # Select best
-        best_resource = max(bandit_scores.keys(), key=lambda k: bandit_scores[k])
-        return best_resource
+            def score(learner_mastery: float, available_time: float) -> np.ndarray:
+                # Thompson sampling scores, one Beta draw per candidate in a single call
+                bandit_scores = self._rng.beta(self._alpha_post[idx], self._beta_post[idx])
+                
+                # Context scores: cached static terms plus the per-request ones
+                context_scores = static_scores + self._dynamic_context_scores(
+                    difficulty, avg_time, learner_mastery, available_time
+                )
+                
+                # Combined score (weighted average)
+                return 0.6 * bandit_scores + 0.4 * context_scores
+                
+        if len(self._selectors) >= 128:
+            self._selectors.pop(next(iter(self._selectors)))
+        self._selectors[key] = selector = (valid, score)
+        return selector
 
 
 def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     """Calculate cosine similarity between two vectors"""
-    if not vec1 or not vec2:
+    if len(vec1) == 0 or len(vec2) == 0:
         return 0.0
         
-    vec1 = np.array(vec1)
-    vec2 = np.array(vec2)
+    vec1 = np.asarray(vec1, dtype=np.float64)
+    norm1 = np.array([np.linalg.norm(vec1)])
     
-    norm1 = np.linalg.norm(vec1)
-    norm2 = np.linalg.norm(vec2)
+    return float(cosine_similarity_batch(np.asarray(vec2, dtype=np.float64), vec1[None, :], norm1)[0])
+
+
+def quantize_int8(vec: List[float]) -> np.ndarray:
+    """Symmetric per-vector int8 quantization (largest magnitude maps to 127)"""
+    vec = np.asarray(vec, dtype=np.float32)
+    peak = np.abs(vec).max() if vec.size else 0.0
+    if peak == 0:
+        return np.zeros(vec.shape, dtype=np.int8)
+    return np.round(vec * (127.0 / peak)).astype(np.int8)
+
+
+def cosine_similarity_batch(query: np.ndarray,
+                            matrix: np.ndarray,
+                            matrix_norms: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of query against every row of matrix in one matmul
     
-    if norm1 == 0 or norm2 == 0:
-        return 0.0
+    Args:
+        query: (D,) vector
+        matrix: (N, D) row vectors
+        matrix_norms: (N,) precomputed L2 norms of matrix rows
         
-    return np.dot(vec1, vec2) / (norm1 * norm2)
+    Returns:
+        (N,) similarities; 0 where either vector has zero norm
+    """
+    query_norm = np.linalg.norm(query)
+    return (matrix @ query) / (matrix_norms * query_norm + 1e-12)
+
+
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
 
 
 def gaussian_pdf(x: float, mu: float = 0.0, sigma: float = 1.0) -> float:
     """Gaussian probability density function"""
-    return (1 / (sigma * np.sqrt(2 * np.pi))) * np.exp(-0.5 * ((x - mu) / sigma) ** 2)
+    z = (x - mu) / sigma
+    return _INV_SQRT_2PI / sigma * math.exp(-0.5 * z * z)
+
+
+def gaussian_pdf_batch(x: np.ndarray, mu: float = 0.0, sigma: float = 1.0) -> np.ndarray:
+    """Gaussian probability density function over an array of x"""
+    z = (np.asarray(x, dtype=np.float64) - mu) / sigma
+    return (_INV_SQRT_2PI / sigma) * np.exp(-0.5 * z * z)
 
 
 if __name__ == "__main__":
@@ -420,7 +802,7 @@ if __name__ == "__main__":
         )
         
         # Simulate outcome (video and interactive tend to work better)
-        success = np.random.random() < (0.7 if selected in ["vid1", "int1"] else 0.4)
+        success = bandit._rng.random() < (0.7 if selected in ["vid1", "int1"] else 0.4)
         bandit.update_reward(selected, success)
         
     # Print statistics
@@ -2,30 +2,195 @@
 Bayesian Knowledge Tracing with Item Response Theory Hybrid Model
 Combines BKT's interpretability with IRT's ability estimation
 """
+import math
+from functools import lru_cache
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, NamedTuple, Tuple, Optional
 from dataclasses import dataclass
-from scipy.stats import norm
-import json
+import orjson
+
+try:
+    from numba import guvectorize, njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Recent mastery readings (one per attempt) kept per user for learning velocity
+_HISTORY_LEN = 32
+
+# Mastery gain per attempt that maps to velocity ~0.88 (0.5 + 0.5 * tanh(2));
+# tanh keeps the scale from saturating at 0 / 1
+_VELOCITY_SCALE = 0.05
+
+# Two-sided 95% normal quantile, norm.ppf(0.975); a constant keeps scipy.stats off the import path
+_Z_95: float = 1.959963984540054
+
+
+def _bkt_irt_kernel(
+    prior: float,
+    theta: float,
+    beta: float,
+    slip: float,
+    guess: float,
+    disc: float,
+    learn: float,
+    correct: bool,
+    time_spent: float
+) -> Tuple[float, float, float, float]:
+    """
+    One attempt's BKT + IRT update, fused into scalar math
+    
+    Steps, in order: BKT likelihood (slip/guess) and Bayesian posterior;
+    one 2PL Newton-Raphson step on ability; confidence from change size,
+    time spent and distance from 0/1; a learning boost on correct answers
+    (no penalty when incorrect). Shared subexpressions are computed once.
+    update_mastery_batch vectorizes the same steps. Returns
+    (posterior_mastery, theta, standard_error, confidence).
+    
+    Clamps are written as inline min(max(...)) so that, under Numba, they
+    compile to branchless min/max without a call into Python.
+    """
+    # Outcome as 0.0 / 1.0 so the steps below select by arithmetic, not by branch
+    c = 1.0 if correct else 0.0
+    
+    # 1-2. BKT likelihood and Bayesian posterior (P(incorrect) = 1 - P(correct))
+    one_m_prior = 1.0 - prior
+    p_correct = prior * (1.0 - slip) + one_m_prior * guess
+    likelihood = c * p_correct + (1.0 - c) * (1.0 - p_correct)
+    numerator = prior * likelihood
+    denominator = numerator + one_m_prior * (1.0 - likelihood)
+    if denominator == 0.0:
+        posterior = prior
+    else:
+        posterior = min(max(numerator / denominator, 0.01), 0.99)
+        
+    # 3. IRT ability (one Newton-Raphson step)
+    probability = 1.0 / (1.0 + math.exp(-disc * (theta - beta)))
+    one_m_probability = 1.0 - probability
+    information = max(disc * disc * probability * one_m_probability, 1e-6)
+    residual = c - probability
+    theta = min(max(theta + residual / information, -3.0), 3.0)
+    se = 1.0 / math.sqrt(information)
+    
+    # 4. Confidence
+    one_m_posterior = 1.0 - posterior
+    confidence = (
+        0.4 * (1.0 - abs(posterior - prior)) +
+        0.3 * min(time_spent / 60.0, 1.0) +
+        0.3 * min(posterior, one_m_posterior) * 2
+    )
+    confidence = min(max(confidence, 0.1), 0.95)
+    
+    # 5. Learning boost on correct answers
+    posterior += c * learn * one_m_posterior * min(time_spent / 30.0, 1.0) * 0.1
+    posterior = min(max(posterior, 0.01), 0.99)
+    
+    return posterior, theta, se, confidence
+
+
+if NUMBA_AVAILABLE:
+    # Compiled lazily and cached to __pycache__; warm_up_kernels() loads (or
+    # builds) the machine code ahead of the first request
+    _bkt_irt_kernel = njit(cache=True, fastmath=True)(_bkt_irt_kernel)
+
+
+def warm_up_kernels():
+    """Compile or load the update kernel now, so importing the module stays cheap."""
+    _bkt_irt_kernel(0.3, 0.0, 0.0, 0.1, 0.2, 1.7, 0.3, True, 0.0)
+
+
+def _occurrence_rank(keys: np.ndarray) -> np.ndarray:
+    """How many earlier elements share each element's key (0 for first occurrences)"""
+    n = len(keys)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    group_start = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    rank = np.empty(n, dtype=np.intp)
+    rank[order] = np.arange(n) - np.repeat(group_start, np.diff(np.r_[group_start, n]))
+    return rank
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    """Logistic function over an array, computed in place in one scratch buffer"""
+    out = np.negative(z)
+    np.exp(out, out=out)
+    out += 1.0
+    return np.reciprocal(out, out=out)
+
+
+def _predict_all_numpy(
+    mastery: np.ndarray,
+    beta: np.ndarray,
+    guess: np.ndarray,
+    like_slope: np.ndarray,
+    theta: float,
+    disc: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """BKT, IRT and combined P(correct) across concepts for one user"""
+    bkt = guess + like_slope * mastery
+    irt = _sigmoid(disc * (theta - beta))
+    return bkt, irt, 0.6 * bkt + 0.4 * irt
+
+
+_predict_all = _predict_all_numpy
+
+if NUMBA_AVAILABLE:
+    # Same contract as the NumPy version, one compiled loop per call. target='cpu':
+    # a single user has no loop dimension for 'parallel' to split across threads
+    @guvectorize(
+        ['void(f8[:], f8[:], f8[:], f8[:], f8, f8, f8[:], f8[:], f8[:])'],
+        '(n),(n),(n),(n),(),()->(n),(n),(n)',
+        target='cpu',
+        cache=True
+    )
+    def _predict_all_gufunc(mastery, beta, guess, like_slope, theta, disc, bkt, irt, combined):
+        for i in range(mastery.shape[0]):
+            bkt[i] = guess[i] + like_slope[i] * mastery[i]
+            irt[i] = 1.0 / (1.0 + math.exp(-disc * (theta - beta[i])))
+            combined[i] = 0.6 * bkt[i] + 0.4 * irt[i]
+
+    _predict_all = _predict_all_gufunc
 
 
-@dataclass
 class UserState:
-    """User knowledge state with IRT ability parameter"""
-    user_id: str
-    concept_mastery: Dict[str, float]
-    theta: float = 0.0  # IRT ability parameter
-    confidence_intervals: Dict[str, Tuple[float, float]] = None
-    last_updated: str = None
+    """
+    View of one user's row in the model's dense state arrays
+    
+    Holds no data of its own: reads build fresh dicts from the arrays and
+    writes to theta go straight through.
+    """
+    __slots__ = ('user_id', '_model', '_row')
+    
+    def __init__(self, model: 'BKTIRTHybrid', user_id: str, row: int):
+        self.user_id = user_id
+        self._model = model
+        self._row = row
+        
+    @property
+    def concept_mastery(self) -> Dict[str, float]:
+        """Mastery per concept the user has attempted"""
+        return self._model._seen_values(self._row, self._model._mastery)
+    
+    @property
+    def theta(self) -> float:
+        """IRT ability parameter"""
+        return float(self._model._theta[self._row])
     
-    def __post_init__(self):
-        if self.confidence_intervals is None:
-            self.confidence_intervals = {}
+    @theta.setter
+    def theta(self, value: float):
+        self._model._theta[self._row] = value
+        
+    @property
+    def confidence_intervals(self) -> Dict[str, Tuple[float, float]]:
+        """95% CI per concept the user has attempted"""
+        lows = self._model._seen_values(self._row, self._model._ci_lo)
+        highs = self._model._seen_values(self._row, self._model._ci_hi)
+        return {k: (low, highs[k]) for k, low in lows.items()}
 
 
-@dataclass
+@dataclass(slots=True)
 class ConceptParams:
-    """Concept parameters for BKT and IRT"""
+    """Concept parameters for BKT and IRT (slotted: no per-instance __dict__)"""
     concept_id: str
     beta: float = 0.0  # IRT difficulty
     slip: float = 0.1  # BKT slip probability
@@ -35,9 +200,8 @@ class ConceptParams:
     discrimination: float = 1.7  # IRT discrimination parameter
 
 
-@dataclass
-class MasteryUpdate:
-    """Result of mastery update"""
+class MasteryUpdate(NamedTuple):
+    """Result of mastery update (a tuple: built positionally once per attempt)"""
     concept_id: str
     prior_mastery: float
     posterior_mastery: float
@@ -51,13 +215,50 @@ class BKTIRTHybrid:
     Hybrid model combining:
     - Bayesian Knowledge Tracing for interpretable mastery tracking
     - Item Response Theory for ability estimation
+    
+    Concept parameters are mirrored into parallel arrays (one row per concept)
+    so batch updates can gather them with a single index operation; set them
+    through initialize_concept / load_state to keep the two in sync.
+    
+    User state lives in dense float32 arrays: mastery and CI bounds are
+    [user, concept] matrices whose columns line up with the concept parameter
+    rows, with NaN marking concepts a user has not attempted yet, and theta is
+    one entry per user.
     """
     
     def __init__(self):
-        self.user_states: Dict[str, UserState] = {}
         self.concept_params: Dict[str, ConceptParams] = {}
         self.discrimination = 1.7  # Common IRT scaling factor
         
+        # Concept parameters as parallel arrays (first len(_concept_idx) rows in use)
+        self._concept_idx: Dict[str, int] = {}
+        self._concept_ids: List[str] = []
+        self._beta = np.zeros(16)
+        self._slip = np.zeros(16)
+        self._guess = np.zeros(16)
+        self._like_slope = np.zeros(16)  # 1 - slip - guess: P(correct) = guess + slope * mastery
+        self._learn = np.zeros(16)
+        self._disc = np.zeros(16)
+        
+        # User state as dense arrays (first len(_user_idx) rows in use)
+        self._user_idx: Dict[str, int] = {}
+        self._mastery = np.full((16, 16), np.nan, dtype=np.float32)
+        self._ci_lo = np.full((16, 16), np.nan, dtype=np.float32)
+        self._ci_hi = np.full((16, 16), np.nan, dtype=np.float32)
+        self._theta = np.zeros(16, dtype=np.float32)
+        # Running sum / count of each user's seen mastery entries, for O(1) overall mastery
+        self._mastery_sum = np.zeros(16)
+        self._mastery_count = np.zeros(16, dtype=np.intp)
+        # Per-user ring buffers of recent posterior mastery, one entry per attempt
+        self._history_m = np.zeros((16, _HISTORY_LEN), dtype=np.float32)
+        self._history_head = np.zeros(16, dtype=np.intp)
+        self._history_count = np.zeros(16, dtype=np.intp)
+        
+    @property
+    def user_count(self) -> int:
+        """Number of users with state"""
+        return len(self._user_idx)
+        
     def initialize_concept(
         self, 
         concept_id: str,
@@ -66,22 +267,96 @@ class BKTIRTHybrid:
         guess: float = 0.2
     ):
         """Initialize parameters for a concept"""
-        self.concept_params[concept_id] = ConceptParams(
+        self._set_concept_params(ConceptParams(
             concept_id=concept_id,
             beta=difficulty,
             slip=slip,
             guess=guess
-        )
+        ))
+        
+    def _set_concept_params(self, params: ConceptParams):
+        """Store concept parameters and mirror them into the parameter arrays"""
+        self.concept_params[params.concept_id] = params
+        
+        c = self._concept_idx.get(params.concept_id)
+        if c is None:
+            c = len(self._concept_idx)
+            if c == len(self._beta):
+                # Grow geometrically so new concepts stay amortized O(1)
+                capacity = 2 * len(self._beta)
+                self._beta = np.resize(self._beta, capacity)
+                self._slip = np.resize(self._slip, capacity)
+                self._guess = np.resize(self._guess, capacity)
+                self._like_slope = np.resize(self._like_slope, capacity)
+                self._learn = np.resize(self._learn, capacity)
+                self._disc = np.resize(self._disc, capacity)
+                self._grow_state(self._mastery.shape[0], capacity)
+            self._concept_idx[params.concept_id] = c
+            self._concept_ids.append(params.concept_id)
+            
+        self._beta[c] = params.beta
+        self._slip[c] = params.slip
+        self._guess[c] = params.guess
+        self._like_slope[c] = 1.0 - params.slip - params.guess
+        self._learn[c] = params.learn
+        self._disc[c] = params.discrimination
+        
+    def _grow_state(self, n_users: int, n_concepts: int):
+        """Reallocate the user state arrays to n_users x n_concepts, keeping contents"""
+        rows, cols = self._mastery.shape
+        for name in ('_mastery', '_ci_lo', '_ci_hi'):
+            grown = np.full((n_users, n_concepts), np.nan, dtype=np.float32)
+            grown[:rows, :cols] = getattr(self, name)
+            setattr(self, name, grown)
+        theta = np.zeros(n_users, dtype=np.float32)
+        theta[:rows] = self._theta
+        self._theta = theta
+        self._mastery_sum = np.resize(self._mastery_sum, n_users)
+        self._mastery_sum[rows:] = 0.0
+        self._mastery_count = np.resize(self._mastery_count, n_users)
+        self._mastery_count[rows:] = 0
+        for name in ('_history_m', '_history_head', '_history_count'):
+            values = getattr(self, name)
+            grown = np.zeros((n_users,) + values.shape[1:], dtype=values.dtype)
+            grown[:rows] = values
+            setattr(self, name, grown)
+        
+    def _user_row(self, user_id: str) -> int:
+        """Row of a user in the state arrays, allocating one for new users"""
+        u = self._user_idx.get(user_id)
+        if u is None:
+            u = len(self._user_idx)
+            if u == self._mastery.shape[0]:
+                # Grow geometrically so new users stay amortized O(1)
+                self._grow_state(2 * u, self._mastery.shape[1])
+            self._user_idx[user_id] = u
+        return u
+    
+    def _refresh_mastery_totals(self, rows: np.ndarray):
+        """Recompute the running mastery sum / count of the given rows from the matrix"""
+        values = self._mastery[rows]
+        seen = ~np.isnan(values)
+        self._mastery_sum[rows] = np.where(seen, values, 0.0).sum(axis=1, dtype=np.float64)
+        self._mastery_count[rows] = seen.sum(axis=1)
+        
+    def _record_history(self, rows: np.ndarray, mastery: np.ndarray):
+        """Push one mastery reading per user into their ring buffers (rows must be distinct)"""
+        head = self._history_head[rows]
+        self._history_m[rows, head] = mastery
+        self._history_head[rows] = (head + 1) % _HISTORY_LEN
+        self._history_count[rows] = np.minimum(self._history_count[rows] + 1, _HISTORY_LEN)
+        
+    def _seen_values(self, row: int, values: np.ndarray) -> Dict[str, float]:
+        """Non-NaN entries of one user's row of a [user, concept] array, by concept"""
+        row_values = values[row, :len(self._concept_ids)]
+        return {
+            self._concept_ids[c]: float(row_values[c])
+            for c in np.flatnonzero(~np.isnan(row_values)).tolist()
+        }
         
     def get_user_state(self, user_id: str) -> UserState:
         """Get or create user state"""
-        if user_id not in self.user_states:
-            self.user_states[user_id] = UserState(
-                user_id=user_id,
-                concept_mastery={},
-                theta=0.0
-            )
-        return self.user_states[user_id]
+        return UserState(self, user_id, self._user_row(user_id))
     
     def get_concept_params(self, concept_id: str) -> ConceptParams:
         """Get or create concept parameters"""
@@ -89,6 +364,130 @@ class BKTIRTHybrid:
             self.initialize_concept(concept_id)
         return self.concept_params[concept_id]
     
+    def _attempt_indices(
+        self,
+        user_ids: List[str],
+        concept_ids: List[str]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """State rows and concept columns of a batch of attempts, registering new ones"""
+        for concept_id in dict.fromkeys(concept_ids):
+            self.get_concept_params(concept_id)
+        n = len(user_ids)
+        u_idx = np.fromiter((self._user_row(u) for u in user_ids), dtype=np.intp, count=n)
+        c_idx = np.fromiter((self._concept_idx[c] for c in concept_ids), dtype=np.intp, count=n)
+        return u_idx, c_idx
+    
+    def update_mastery_batch(
+        self,
+        user_ids: List[str],
+        concept_ids: List[str],
+        correct: np.ndarray,
+        time_spent: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Apply many attempts at once (e.g. log replay), vectorized with NumPy
+        
+        Equivalent to calling update_mastery for each attempt in order. A
+        user's ability is shared across concepts, so attempts are processed in
+        waves holding at most one attempt per user; wave k is every user's k-th
+        attempt in the batch.
+        
+        Args:
+            user_ids: User per attempt
+            concept_ids: Concept per attempt
+            correct: Correctness per attempt
+            time_spent: Seconds per attempt (default 0)
+            
+        Returns:
+            Dict of per-attempt arrays (input order): prior_mastery,
+            posterior_mastery, confidence, ability, standard_error
+        """
+        n = len(user_ids)
+        correct = np.asarray(correct, dtype=bool)
+        time_spent = np.zeros(n) if time_spent is None else np.asarray(time_spent, dtype=np.float64)
+        
+        u_idx, c_idx = self._attempt_indices(user_ids, concept_ids)
+        
+        # Wave number = occurrence rank of the attempt's user within the batch
+        wave = _occurrence_rank(u_idx)
+        
+        out = {key: np.empty(n) for key in
+               ('prior_mastery', 'posterior_mastery', 'confidence', 'ability', 'standard_error')}
+        
+        # Per-attempt concept parameters are fixed for the batch: gather them once
+        guess_all = self._guess[c_idx]
+        like_slope_all = self._like_slope[c_idx]
+        beta_all = self._beta[c_idx]
+        learn_all = self._learn[c_idx]
+        disc_all = self._disc[c_idx]
+        mastery_state, theta_state = self._mastery, self._theta
+        ci_lo_state, ci_hi_state = self._ci_lo, self._ci_hi
+        mastery_sum, mastery_count = self._mastery_sum, self._mastery_count
+        for w in range(int(wave.max()) + 1 if n else 0):
+            sel = np.flatnonzero(wave == w)
+            u = u_idx[sel]
+            c = c_idx[sel]
+            ok = correct[sel]
+            ts = time_spent[sel]
+            
+            # Gather state (default 0.3 mastery for new concepts)
+            prior = mastery_state[u, c].astype(np.float64)
+            new_entry = np.isnan(prior)
+            prior[new_entry] = 0.3
+            theta = theta_state[u].astype(np.float64)
+            disc = disc_all[sel]
+            
+            # 1-2. BKT likelihood and Bayesian posterior (P(incorrect) = 1 - P(correct))
+            p_correct = guess_all[sel] + like_slope_all[sel] * prior
+            likelihood = np.where(ok, p_correct, 1 - p_correct)
+            numerator = prior * likelihood
+            denominator = numerator + (1 - prior) * (1 - likelihood)
+            posterior = np.clip(
+                np.divide(numerator, denominator, out=prior.copy(), where=denominator != 0),
+                0.01, 0.99
+            )
+            posterior = np.where(denominator == 0, prior, posterior)
+            
+            # 3. IRT ability (one Newton-Raphson step)
+            probability = _sigmoid(disc * (theta - beta_all[sel]))
+            information = np.maximum(disc * disc * probability * (1 - probability), 1e-6)
+            theta = np.clip(theta + (ok - probability) / information, -3, 3)
+            se = 1 / np.sqrt(information)
+            
+            # 4. Confidence
+            one_m_posterior = 1 - posterior
+            confidence = np.clip(
+                0.4 * (1.0 - np.abs(posterior - prior)) +
+                0.3 * np.minimum(ts / 60.0, 1.0) +
+                0.3 * np.minimum(posterior, one_m_posterior) * 2,
+                0.1, 0.95
+            )
+            
+            # 5. Learning boost on correct answers (masked by correctness, adds 0.0 otherwise)
+            boost = learn_all[sel] * one_m_posterior * np.minimum(ts / 30.0, 1.0) * 0.1
+            posterior = np.clip(posterior + ok * boost, 0.01, 0.99)
+            
+            # 95% CI
+            ci_low = np.maximum(0.01, posterior - _Z_95 * se)
+            ci_high = np.minimum(0.99, posterior + _Z_95 * se)
+            
+            # Scatter back (one attempt per user in a wave, so no index collisions)
+            mastery_state[u, c] = posterior
+            theta_state[u] = theta
+            mastery_sum[u] += mastery_state[u, c] - np.where(new_entry, 0.0, prior)
+            mastery_count[u] += new_entry
+            self._record_history(u, posterior)
+            ci_lo_state[u, c] = ci_low
+            ci_hi_state[u, c] = ci_high
+                
+            out['prior_mastery'][sel] = prior
+            out['posterior_mastery'][sel] = posterior
+            out['confidence'][sel] = confidence
+            out['ability'][sel] = theta
+            out['standard_error'][sel] = se
+            
+        return out
+    
     def update_mastery(
         self,
         user_id: str,
@@ -108,181 +507,40 @@ class BKTIRTHybrid:
         Returns:
             MasteryUpdate with detailed information
         """
-        user_state = self.get_user_state(user_id)
-        concept_params = self.get_concept_params(concept_id)
+        cp = self.get_concept_params(concept_id)
+        u = self._user_row(user_id)
+        c = self._concept_idx[concept_id]
+        mastery, theta_state = self._mastery, self._theta
         
         # Get prior mastery (default 0.3 for new concepts)
-        prior_mastery = user_state.concept_mastery.get(concept_id, 0.3)
-        
-        # 1. BKT Update: Calculate likelihood
-        likelihood = self._calculate_likelihood(
-            correct, prior_mastery, concept_params
-        )
-        
-        # 2. Bayesian posterior update
-        posterior_mastery = self._bayesian_update(prior_mastery, likelihood)
-        
-        # 3. IRT ability estimation
-        ability_update = self._update_ability_estimate(
-            user_state.theta,
-            concept_params.beta,
-            correct,
-            concept_params.discrimination
-        )
-        
-        # 4. Calculate confidence
-        confidence = self._calculate_confidence(
-            prior_mastery,
-            posterior_mastery,
-            time_spent
-        )
-        
-        # 5. Apply learning and forgetting
-        posterior_mastery = self._apply_learning_forgetting(
-            posterior_mastery,
-            correct,
-            concept_params.learn,
-            time_spent
+        prior_mastery = float(mastery[u, c])
+        new_entry = prior_mastery != prior_mastery  # NaN: not attempted yet
+        if new_entry:
+            prior_mastery = 0.3
+        
+        posterior_mastery, theta, se, confidence = _bkt_irt_kernel(
+            prior_mastery, float(theta_state[u]),
+            cp.beta, cp.slip, cp.guess, cp.discrimination, cp.learn,
+            bool(correct), float(time_spent)
         )
         
         # Update user state
-        user_state.concept_mastery[concept_id] = posterior_mastery
-        user_state.theta = ability_update['theta']
-        user_state.confidence_intervals[concept_id] = self._calculate_ci(
-            posterior_mastery, ability_update['se']
-        )
-        
-        return MasteryUpdate(
-            concept_id=concept_id,
-            prior_mastery=prior_mastery,
-            posterior_mastery=posterior_mastery,
-            confidence=confidence,
-            ability=ability_update['theta'],
-            standard_error=ability_update['se']
-        )
-    
-    def _calculate_likelihood(
-        self,
-        correct: bool,
-        mastery: float,
-        params: ConceptParams
-    ) -> float:
-        """Calculate likelihood using BKT model"""
-        if correct:
-            # P(correct) = P(knows) * (1 - slip) + P(doesn't know) * guess
-            return mastery * (1 - params.slip) + (1 - mastery) * params.guess
+        mastery[u, c] = posterior_mastery
+        theta_state[u] = theta
+        stored = float(mastery[u, c])  # float32-rounded, as later reads will see it
+        if new_entry:
+            self._mastery_sum[u] += stored
+            self._mastery_count[u] += 1
         else:
-            # P(incorrect) = P(knows) * slip + P(doesn't know) * (1 - guess)
-            return mastery * params.slip + (1 - mastery) * (1 - params.guess)
-    
-    def _bayesian_update(self, prior: float, likelihood: float) -> float:
-        """Bayesian posterior update"""
-        # Normalize posterior
-        numerator = prior * likelihood
-        denominator = prior * likelihood + (1 - prior) * (1 - likelihood)
-        
-        if denominator == 0:
-            return prior
-        
-        posterior = numerator / denominator
-        return np.clip(posterior, 0.01, 0.99)
-    
-    def _update_ability_estimate(
-        self,
-        theta: float,
-        beta: float,
-        correct: bool,
-        discrimination: float
-    ) -> Dict[str, float]:
-        """
-        Update IRT ability estimate using Newton-Raphson
-        
-        Uses 2PL (Two-Parameter Logistic) IRT model:
-        P(correct|theta, beta) = 1 / (1 + exp(-discrimination * (theta - beta)))
-        """
-        # Calculate probability of correct response
-        z = discrimination * (theta - beta)
-        probability = 1 / (1 + np.exp(-z))
-        
-        # Fisher information for standard error
-        information = (discrimination ** 2) * probability * (1 - probability)
-        
-        # Newton-Raphson update
-        residual = (1 if correct else 0) - probability
-        
-        # Prevent division by zero
-        if information < 1e-6:
-            information = 1e-6
-        
-        theta_update = theta + residual / information
-        
-        # Bound theta to reasonable range
-        theta_update = np.clip(theta_update, -3, 3)
-        
-        # Standard error
-        se = 1 / np.sqrt(information) if information > 0 else 1.0
-        
-        return {
-            'theta': theta_update,
-            'se': se,
-            'probability': probability
-        }
-    
-    def _calculate_confidence(
-        self,
-        prior: float,
-        posterior: float,
-        time_spent: float
-    ) -> float:
-        """
-        Calculate confidence in mastery estimate
-        
-        Factors:
-        - Change magnitude (smaller = more stable = higher confidence)
-        - Time spent (more time = more information = higher confidence)
-        - Distance from boundaries (0 or 1)
-        """
-        # Change-based confidence
-        change = abs(posterior - prior)
-        change_confidence = 1.0 - change
-        
-        # Time-based confidence (normalize to 0-1, max at 60 seconds)
-        time_confidence = min(time_spent / 60.0, 1.0)
-        
-        # Boundary-based confidence (lower near 0 or 1)
-        boundary_distance = min(posterior, 1 - posterior) * 2
-        
-        # Weighted combination
-        confidence = (
-            0.4 * change_confidence +
-            0.3 * time_confidence +
-            0.3 * boundary_distance
-        )
-        
-        return np.clip(confidence, 0.1, 0.95)
-    
-    def _apply_learning_forgetting(
-        self,
-        mastery: float,
-        correct: bool,
-        learn_rate: float,
-        time_spent: float
-    ) -> float:
-        """
-        Apply learning gain or forgetting based on performance
-        
-        - Correct answer: slight learning boost
-        - Incorrect answer: no penalty (growth mindset)
-        - Time factor: more time = more learning
-        """
-        if correct:
-            # Learning boost proportional to time and current mastery gap
-            learning_potential = 1.0 - mastery
-            time_factor = min(time_spent / 30.0, 1.0)  # Normalize to 30s
-            boost = learn_rate * learning_potential * time_factor * 0.1
-            mastery += boost
-        
-        return np.clip(mastery, 0.01, 0.99)
+            self._mastery_sum[u] += stored - prior_mastery
+        head = int(self._history_head[u])
+        self._history_m[u, head] = posterior_mastery
+        self._history_head[u] = (head + 1) % _HISTORY_LEN
+        if self._history_count[u] < _HISTORY_LEN:
+            self._history_count[u] += 1
+        self._ci_lo[u, c], self._ci_hi[u, c] = self._calculate_ci(posterior_mastery, se)
+        
+        return MasteryUpdate(concept_id, prior_mastery, posterior_mastery, confidence, theta, se)
     
     def _calculate_ci(
         self,
@@ -290,8 +548,7 @@ class BKTIRTHybrid:
         standard_error: float
     ) -> Tuple[float, float]:
         """Calculate 95% confidence interval"""
-        z_score = 1.96  # 95% CI
-        margin = z_score * standard_error
+        margin = _Z_95 * standard_error
         
         lower = max(0.01, mastery - margin)
         upper = min(0.99, mastery + margin)
@@ -307,20 +564,22 @@ class BKTIRTHybrid:
         Predict probability of correct response
         Uses hybrid BKT + IRT
         """
-        user_state = self.get_user_state(user_id)
         concept_params = self.get_concept_params(concept_id)
+        u = self._user_row(user_id)
+        
+        beta, slip, guess = concept_params.beta, concept_params.slip, concept_params.guess
         
-        mastery = user_state.concept_mastery.get(concept_id, 0.3)
-        theta = user_state.theta
-        beta = concept_params.beta
+        mastery = float(self._mastery[u, self._concept_idx[concept_id]])
+        if mastery != mastery:  # NaN: not attempted yet
+            mastery = 0.3
+        theta = float(self._theta[u])
         
         # BKT prediction
-        bkt_prob = mastery * (1 - concept_params.slip) + \
-                   (1 - mastery) * concept_params.guess
+        bkt_prob = mastery * (1 - slip) + (1 - mastery) * guess
         
         # IRT prediction
         z = self.discrimination * (theta - beta)
-        irt_prob = 1 / (1 + np.exp(-z))
+        irt_prob = 1.0 / (1.0 + math.exp(-z))
         
         # Weighted combination (favor IRT for ability, BKT for mastery)
         combined_prob = 0.6 * bkt_prob + 0.4 * irt_prob
@@ -334,56 +593,124 @@ class BKTIRTHybrid:
             'difficulty': beta
         }
     
+    def predict_performance_all(self, user_id: str) -> Dict[str, Dict[str, float]]:
+        """
+        Predict probability of correct response for every known concept
+        
+        Same figures as predict_performance, computed for the whole course in
+        one pass over the user's mastery row.
+        """
+        u = self._user_row(user_id)
+        n = len(self._concept_ids)
+        
+        mastery = self._mastery[u, :n].astype(np.float64)
+        mastery[np.isnan(mastery)] = 0.3
+        theta = float(self._theta[u])
+        beta = self._beta[:n]
+        
+        bkt, irt, combined = _predict_all(
+            mastery, beta, self._guess[:n], self._like_slope[:n], theta, self.discrimination
+        )
+        
+        return {
+            concept_id: {
+                'combined_probability': c,
+                'bkt_probability': b,
+                'irt_probability': i,
+                'mastery': m,
+                'ability': theta,
+                'difficulty': d
+            }
+            for concept_id, c, b, i, m, d in zip(
+                self._concept_ids, combined.tolist(), bkt.tolist(),
+                irt.tolist(), mastery.tolist(), beta.tolist()
+            )
+        }
+    
     def get_knowledge_state(self, user_id: str) -> Dict:
         """Get complete knowledge state for user"""
-        user_state = self.get_user_state(user_id)
+        u = self._user_row(user_id)
         
-        # Calculate overall mastery
-        masteries = list(user_state.concept_mastery.values())
-        overall_mastery = np.mean(masteries) if masteries else 0.3
+        # Overall mastery from the running totals
+        count = self._mastery_count[u]
+        overall_mastery = self._mastery_sum[u] / count if count else 0.3
+        
+        row = self._mastery[u, :len(self._concept_ids)]
+        seen = np.flatnonzero(~np.isnan(row))
         
         # Calculate learning velocity (recent trend)
         learning_velocity = self._estimate_learning_velocity(user_id)
         
+        concepts = [self._concept_ids[c] for c in seen.tolist()]
+        ci_lo = self._ci_lo[u, seen].tolist()
+        ci_hi = self._ci_hi[u, seen].tolist()
         return {
             'user_id': user_id,
-            'concept_mastery': dict(user_state.concept_mastery),
+            'concept_mastery': dict(zip(concepts, row[seen].tolist())),
             'overall_mastery': float(overall_mastery),
-            'ability': float(user_state.theta),
+            'ability': float(self._theta[u]),
             'confidence_intervals': {
-                k: [float(v[0]), float(v[1])]
-                for k, v in user_state.confidence_intervals.items()
+                k: [low, high] for k, low, high in zip(concepts, ci_lo, ci_hi)
             },
             'learning_velocity': float(learning_velocity),
-            'concept_count': len(user_state.concept_mastery)
+            'concept_count': len(concepts)
         }
     
     def _estimate_learning_velocity(self, user_id: str) -> float:
         """
         Estimate learning velocity (rate of mastery improvement)
-        Placeholder - would use historical data in production
+        
+        Least-squares slope of the user's recent mastery readings against
+        attempt order (mastery gained per attempt), mapped to 0-1 with 0.5
+        meaning no trend (also returned when there is not enough history).
+        Depends only on the attempt sequence, so batch replays and live
+        updates agree.
         """
-        user_state = self.get_user_state(user_id)
+        u = self._user_row(user_id)
+        n = int(self._history_count[u])
+        if n < 2:
+            return 0.5
+        
+        # Oldest reading first: once the ring is full it starts at the write head
+        masteries = np.roll(self._history_m[u], -int(self._history_head[u]))[-n:].astype(np.float64)
+        ordinals = np.arange(n) - (n - 1) / 2
+        slope = (ordinals * (masteries - masteries.mean())).sum() / (ordinals * ordinals).sum()
         
-        # Simple estimate based on ability parameter
-        # Positive theta = faster learner
-        velocity = (user_state.theta + 3) / 6  # Normalize to 0-1
-        return np.clip(velocity, 0.0, 1.0)
+        return 0.5 + 0.5 * math.tanh(float(slope) / _VELOCITY_SCALE)
     
     def export_state(self) -> Dict:
         """Export model state for persistence"""
+        n_users, n_concepts = len(self._user_idx), len(self._concept_ids)
+        thetas = self._theta[:n_users].tolist()
+        
+        # Seen entries in row-major order, converted to Python lists in one call each;
+        # bounds[u]:bounds[u + 1] is user row u's slice
+        def seen_entries(values: np.ndarray):
+            rows, cols = np.nonzero(~np.isnan(values[:n_users, :n_concepts]))
+            bounds = np.searchsorted(rows, np.arange(n_users + 1)).tolist()
+            concepts = [self._concept_ids[c] for c in cols.tolist()]
+            return bounds, concepts, rows, cols
+        
+        m_bounds, m_concepts, rows, cols = seen_entries(self._mastery)
+        masteries = self._mastery[rows, cols].tolist()
+        ci_bounds, ci_concepts, rows, cols = seen_entries(self._ci_lo)
+        ci_pairs = np.stack([self._ci_lo[rows, cols], self._ci_hi[rows, cols]], axis=1).tolist()
+        
+        user_states = {}
+        for user_id, u in self._user_idx.items():
+            start, end = m_bounds[u], m_bounds[u + 1]
+            ci_start, ci_end = ci_bounds[u], ci_bounds[u + 1]
+            user_states[user_id] = {
+                'user_id': user_id,
+                'concept_mastery': dict(zip(m_concepts[start:end], masteries[start:end])),
+                'theta': thetas[u],
+                'confidence_intervals': dict(zip(
+                    ci_concepts[ci_start:ci_end], ci_pairs[ci_start:ci_end]
+                ))
+            }
+            
         return {
-            'user_states': {
-                user_id: {
-                    'user_id': state.user_id,
-                    'concept_mastery': state.concept_mastery,
-                    'theta': state.theta,
-                    'confidence_intervals': {
-                        k: list(v) for k, v in state.confidence_intervals.items()
-                    }
-                }
-                for user_id, state in self.user_states.items()
-            },
+            'user_states': user_states,
             'concept_params': {
                 concept_id: {
                     'concept_id': params.concept_id,
@@ -400,24 +727,95 @@ class BKTIRTHybrid:
     
     def load_state(self, state: Dict):
         """Load model state from persistence"""
-        # Load user states
+        # Load concept parameters first so every mastery entry has a column
+        for concept_id, params_data in state.get('concept_params', {}).items():
+            self._set_concept_params(ConceptParams(**params_data))
+            
+        # Load user states (replacing any existing row)
+        rows = []
         for user_id, user_data in state.get('user_states', {}).items():
-            self.user_states[user_id] = UserState(
-                user_id=user_data['user_id'],
-                concept_mastery=user_data['concept_mastery'],
-                theta=user_data['theta'],
-                confidence_intervals={
-                    k: tuple(v) for k, v in user_data.get('confidence_intervals', {}).items()
-                }
-            )
+            u = self._user_row(user_data['user_id'])
+            rows.append(u)
+            self._mastery[u] = np.nan
+            self._ci_lo[u] = np.nan
+            self._ci_hi[u] = np.nan
+            self._theta[u] = user_data['theta']
+            for concept_id, mastery in user_data['concept_mastery'].items():
+                self.get_concept_params(concept_id)
+                self._mastery[u, self._concept_idx[concept_id]] = mastery
+            for concept_id, (low, high) in user_data.get('confidence_intervals', {}).items():
+                self.get_concept_params(concept_id)
+                c = self._concept_idx[concept_id]
+                self._ci_lo[u, c] = low
+                self._ci_hi[u, c] = high
+        rows = np.array(rows, dtype=np.intp)
+        self._refresh_mastery_totals(rows)
+        self._history_head[rows] = 0
+        self._history_count[rows] = 0
+    
+    def dumps(self) -> bytes:
+        """Serialize model state to JSON bytes (orjson)"""
+        return orjson.dumps(self.export_state())
+        
+    @classmethod
+    def loads(cls, data: bytes) -> 'BKTIRTHybrid':
+        """Load a model from JSON produced by dumps()"""
+        model = cls()
+        model.load_state(orjson.loads(data))
+        return model
+    
+    def save(self, path: str):
+        """
+        Save model state to a compressed .npz archive
         
-        # Load concept parameters
-        for concept_id, params_data in state.get('concept_params', {}).items():
-            self.concept_params[concept_id] = ConceptParams(**params_data)
+        Writes the dense state arrays directly, so it scales with the array
+        size rather than with per-entry Python work; export_state remains the
+        JSON-friendly dict form.
+        """
+        n_users, n_concepts = len(self._user_idx), len(self._concept_ids)
+        np.savez_compressed(
+            path,
+            users=np.array(list(self._user_idx), dtype=str),
+            concepts=np.array(self._concept_ids, dtype=str),
+            mastery=self._mastery[:n_users, :n_concepts],
+            ci_lo=self._ci_lo[:n_users, :n_concepts],
+            ci_hi=self._ci_hi[:n_users, :n_concepts],
+            theta=self._theta[:n_users],
+            params=np.array([
+                [p.beta, p.slip, p.guess, p.learn, p.transit, p.discrimination]
+                for p in (self.concept_params[c] for c in self._concept_ids)
+            ], dtype=np.float64).reshape(n_concepts, 6)
+        )
+        
+    def load(self, path: str):
+        """Load model state saved by save() (replacing the saved users' rows)"""
+        with np.load(path) as data:
+            concepts = data['concepts'].tolist()
+            for concept_id, (beta, slip, guess, learn, transit, disc) in zip(
+                concepts, data['params'].tolist()
+            ):
+                self._set_concept_params(ConceptParams(
+                    concept_id=concept_id, beta=beta, slip=slip, guess=guess,
+                    learn=learn, transit=transit, discrimination=disc
+                ))
+                
+            rows = np.fromiter((self._user_row(u) for u in data['users'].tolist()), dtype=np.intp)
+            cols = np.fromiter((self._concept_idx[c] for c in concepts), dtype=np.intp)
+            for name, key in (('_mastery', 'mastery'), ('_ci_lo', 'ci_lo'), ('_ci_hi', 'ci_hi')):
+                values = getattr(self, name)
+                values[rows] = np.nan
+                values[np.ix_(rows, cols)] = data[key]
+            self._theta[rows] = data['theta']
+            self._refresh_mastery_totals(rows)
+            self._history_head[rows] = 0
+            self._history_count[rows] = 0
 
 
-# Global instance
-bkt_irt_model = BKTIRTHybrid()
+@lru_cache(maxsize=None)
+def get_default_model() -> BKTIRTHybrid:
+    """Shared process-wide model, created (and its kernel warmed) on first use rather than at import"""
+    warm_up_kernels()
+    return BKTIRTHybrid()
 
 
 if __name__ == "__main__":
@@ -7,11 +7,25 @@ Provides AI-powered features for group learning including:
 - Conversation summarization
 """
 
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException
+from typing import List, Dict, Any, Optional, Tuple
+from pydantic import BaseModel, PrivateAttr, TypeAdapter
+from fastapi import FastAPI, HTTPException, Response
+import asyncio
+import os
 import random
+import string
 from datetime import datetime
+from functools import lru_cache
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from types import MappingProxyType
+import heapq
+import numpy as np
+
+# Punctuation -> space, so "loops," and "loops" count as the same word
+_PUNCT_TO_SPACE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+
 
 # Pydantic models for request/response
 
@@ -61,6 +75,14 @@ class ChatMessage(BaseModel):
     message: str
     timestamp: str
     type: str = "text"
+    _tokens: Optional[List[str]] = PrivateAttr(default=None)
+
+    def tokens(self) -> List[str]:
+        """Lowercased words longer than 5 chars (punctuation stripped), computed once per message"""
+        if self._tokens is None:
+            words = self.message.lower().translate(_PUNCT_TO_SPACE).split()
+            self._tokens = [w for w in words if len(w) > 5]
+        return self._tokens
 
 class FacilitationRequest(BaseModel):
     action: str = "summarize"
@@ -112,7 +134,252 @@ class Summary(BaseModel):
     nextSteps: List[str]
 
 
+# Static question templates: difficulty -> concept -> question fields
+
+_QUESTION_TEMPLATES = {
+    "easy": {
+        "functions": {
+            "question": "What is the purpose of a function in programming?",
+            "options": [
+                "To reuse code and organize logic",
+                "To store data permanently",
+                "To create loops",
+                "To define variables"
+            ],
+            "correctAnswer": "To reuse code and organize logic",
+            "explanation": "Functions allow you to encapsulate reusable logic and call it multiple times."
+        },
+        "variables": {
+            "question": "What is a variable?",
+            "options": [
+                "A named storage location for data",
+                "A type of function",
+                "A looping construct",
+                "A programming language"
+            ],
+            "correctAnswer": "A named storage location for data",
+            "explanation": "Variables store data values that can be used and modified in your program."
+        },
+        "loops": {
+            "question": "What does a loop do?",
+            "options": [
+                "Repeats a block of code multiple times",
+                "Stores data",
+                "Defines functions",
+                "Creates variables"
+            ],
+            "correctAnswer": "Repeats a block of code multiple times",
+            "explanation": "Loops allow you to execute code repeatedly until a condition is met."
+        }
+    },
+    "medium": {
+        "functions": {
+            "question": "What is the difference between parameters and arguments?",
+            "options": [
+                "Parameters are in the definition, arguments are passed when calling",
+                "They are the same thing",
+                "Arguments are in the definition, parameters are passed when calling",
+                "Parameters are only for return values"
+            ],
+            "correctAnswer": "Parameters are in the definition, arguments are passed when calling",
+            "explanation": "Parameters are variables in the function definition; arguments are the actual values passed."
+        },
+        "variables": {
+            "question": "What is variable scope?",
+            "options": [
+                "The region where a variable can be accessed",
+                "The size of a variable",
+                "The type of a variable",
+                "The speed of variable access"
+            ],
+            "correctAnswer": "The region where a variable can be accessed",
+            "explanation": "Scope determines where in the code a variable is visible and accessible."
+        },
+        "loops": {
+            "question": "What is the difference between 'for' and 'while' loops?",
+            "options": [
+                "'for' is for known iterations, 'while' is for unknown iterations",
+                "They are exactly the same",
+                "'while' is faster than 'for'",
+                "'for' loops can't use conditions"
+            ],
+            "correctAnswer": "'for' is for known iterations, 'while' is for unknown iterations",
+            "explanation": "Use 'for' when you know how many times to iterate, 'while' when it depends on a condition."
+        }
+    },
+    "hard": {
+        "functions": {
+            "question": "What is a closure in programming?",
+            "options": [
+                "A function that captures variables from its outer scope",
+                "A way to close files",
+                "A type of loop",
+                "A way to end programs"
+            ],
+            "correctAnswer": "A function that captures variables from its outer scope",
+            "explanation": "Closures allow functions to access variables from their enclosing scope even after that scope has finished executing."
+        },
+        "variables": {
+            "question": "What is the difference between shallow and deep copying?",
+            "options": [
+                "Shallow copies references, deep copies all nested objects",
+                "They are the same",
+                "Shallow is faster but deep is more secure",
+                "Deep copies only work with primitives"
+            ],
+            "correctAnswer": "Shallow copies references, deep copies all nested objects",
+            "explanation": "Shallow copy creates a new object but references nested objects; deep copy recursively copies everything."
+        },
+        "loops": {
+            "question": "What is tail recursion optimization?",
+            "options": [
+                "Converting recursive calls into iterations to save stack space",
+                "A way to speed up loops",
+                "A method to break out of loops early",
+                "A technique for nested loops"
+            ],
+            "correctAnswer": "Converting recursive calls into iterations to save stack space",
+            "explanation": "Tail recursion optimization allows recursive functions to execute without growing the call stack."
+        }
+    }
+}
+
+# Validated once at import; generate_question hands out these shared instances
+_TEMPLATE_CACHE: Dict[str, Dict[str, Question]] = {
+    difficulty: {
+        concept: Question(type="multiple_choice", difficulty=difficulty, **template)
+        for concept, template in templates.items()
+    }
+    for difficulty, templates in _QUESTION_TEMPLATES.items()
+}
+
+
+# Static response content, shared by every response (never mutated)
+
+_SUCCESS_CRITERIA = [
+    "All team members contribute to the solution",
+    "Code demonstrates mastery of all target concepts",
+    "Solution includes proper error handling and edge cases",
+    "Team provides clear documentation of approach"
+]
+
+_PROBLEM_REQUIREMENTS = (
+    "Include comprehensive test cases",
+    "Provide clear code comments and documentation",
+    "Consider performance and scalability",
+    "Handle edge cases appropriately"
+)
+
+_PROBLEM_HINTS = [
+    "Start by breaking down the problem into smaller subtasks",
+    "Assign roles based on team member strengths",
+    "Review each other's code before integrating",
+    "Test individual components before full integration",
+    "Discuss edge cases as a team"
+]
+
+_FACILITATION_NEXT_STEPS = [
+    "Review the priority concept together before starting exercises",
+    "Try the collaborative coding challenge as a team",
+    "Each member complete personalized questions to assess understanding",
+    "Share insights and learning strategies with the group"
+]
+
+_FACILITATION_ACTION_ITEMS = [
+    ActionItem.model_construct(
+        task="Complete individual assessment questions",
+        assignedTo=None,
+        reason="Establish baseline understanding for each member"
+    ),
+    ActionItem.model_construct(
+        task="Collaborate on team challenge",
+        assignedTo=None,
+        reason="Practice working together and applying concepts"
+    ),
+    ActionItem.model_construct(
+        task="Peer review and feedback session",
+        assignedTo=None,
+        reason="Learn from each other's approaches and solutions"
+    )
+]
+
+_ROLE_RESPONSIBILITIES = MappingProxyType({
+    "Driver": [
+        "Write the primary code implementation",
+        "Execute team's technical decisions",
+        "Maintain code quality and style"
+    ],
+    "Navigator": [
+        "Guide overall direction and strategy",
+        "Suggest approaches and review logic",
+        "Help catch errors and edge cases"
+    ],
+    "Researcher": [
+        "Find relevant documentation and resources",
+        "Research best practices and patterns",
+        "Investigate solution alternatives"
+    ],
+    "Reviewer": [
+        "Review code quality and correctness",
+        "Test solutions thoroughly",
+        "Provide constructive feedback"
+    ],
+    "Facilitator": [
+        "Coordinate team communication",
+        "Ensure everyone participates",
+        "Manage time and progress"
+    ]
+})
+
+# Role fit for the strengths strategy: how much each role draws on a concept.
+# Concepts without an entry use the role's base weight, so stronger members
+# still lean towards Navigator/Driver and weaker ones towards Researcher.
+_ROLE_BASE_AFFINITY = MappingProxyType({
+    "Navigator": 1.0,
+    "Driver": 0.8,
+    "Reviewer": 0.6,
+    "Researcher": 0.3
+})
+
+# Placeholder weights picked by hand for the demo concepts; not derived from
+# any data or study. Replace with measured role/concept fit when available.
+_ROLE_CONCEPT_AFFINITY = MappingProxyType({
+    "Navigator": {"functions": 1.0, "loops": 0.9, "variables": 0.8},
+    "Driver": {"loops": 1.0, "functions": 0.8, "variables": 0.8},
+    "Reviewer": {"variables": 0.8, "functions": 0.6, "loops": 0.6},
+    "Researcher": {}
+})
+
+# Above this team size the strengths strategy keeps the rank-order greedy
+_OPTIMAL_ASSIGNMENT_MAX_TEAM = 200
+
+_SUMMARY_DECISIONS = [
+    "Team agreed to focus on priority concepts",
+    "Members will complete individual exercises first"
+]
+
+_SUMMARY_QUESTIONS = [
+    "What's the best approach for handling edge cases?",
+    "Should we optimize for performance or readability?",
+    "How do we integrate individual solutions?"
+]
+
+_SUMMARY_NEXT_STEPS = [
+    "Complete individual assessment questions",
+    "Reconvene to discuss findings",
+    "Begin collaborative challenge as a team"
+]
+
+
 # Quiz generation logic
+#
+# Responses are assembled with model_construct: everything they hold comes from
+# already-validated requests or server-side constants, so validation only runs
+# on inbound requests.
+
+_MASTERY_BUCKET_EDGES = np.array([0.4, 0.7])
+_ADAPTIVE_DIFFICULTIES = ("easy", "medium", "hard")
+
 
 def generate_questions_for_member(
     member: MemberMastery, 
@@ -120,25 +387,23 @@ def generate_questions_for_member(
     difficulty: str
 ) -> List[Question]:
     """Generate personalized questions based on member's mastery level"""
-    questions = []
+    if difficulty == "adaptive":
+        # Adaptive difficulty based on mastery: <0.4 easy, <0.7 medium, else hard
+        scores = np.fromiter(
+            (member.mastery.get(concept, 0.5) for concept in concepts),
+            dtype=np.float64,
+            count=len(concepts)
+        )
+        buckets = np.digitize(scores, _MASTERY_BUCKET_EDGES).tolist()
+        difficulties = [_ADAPTIVE_DIFFICULTIES[b] for b in buckets]
+    else:
+        difficulties = [difficulty] * len(concepts)
     
-    for concept in concepts:
-        mastery_score = member.mastery.get(concept, 0.5)
-        
-        # Adaptive difficulty based on mastery
-        if difficulty == "adaptive":
-            if mastery_score < 0.4:
-                q_difficulty = "easy"
-            elif mastery_score < 0.7:
-                q_difficulty = "medium"
-            else:
-                q_difficulty = "hard"
-        else:
-            q_difficulty = difficulty
-        
-        # Generate question based on concept and difficulty
-        question = generate_question(concept, q_difficulty)
-        questions.append(question)
+    # Generate question based on concept and difficulty
+    questions = [
+        generate_question(concept, q_difficulty)
+        for concept, q_difficulty in zip(concepts, difficulties)
+    ]
     
     return questions
 
@@ -146,160 +411,65 @@ def generate_questions_for_member(
 def generate_question(concept: str, difficulty: str) -> Question:
     """Generate a single question for a concept at given difficulty"""
     
-    question_templates = {
-        "easy": {
-            "functions": {
-                "question": "What is the purpose of a function in programming?",
-                "options": [
-                    "To reuse code and organize logic",
-                    "To store data permanently",
-                    "To create loops",
-                    "To define variables"
-                ],
-                "correctAnswer": "To reuse code and organize logic",
-                "explanation": "Functions allow you to encapsulate reusable logic and call it multiple times."
-            },
-            "variables": {
-                "question": "What is a variable?",
-                "options": [
-                    "A named storage location for data",
-                    "A type of function",
-                    "A looping construct",
-                    "A programming language"
-                ],
-                "correctAnswer": "A named storage location for data",
-                "explanation": "Variables store data values that can be used and modified in your program."
-            },
-            "loops": {
-                "question": "What does a loop do?",
-                "options": [
-                    "Repeats a block of code multiple times",
-                    "Stores data",
-                    "Defines functions",
-                    "Creates variables"
-                ],
-                "correctAnswer": "Repeats a block of code multiple times",
-                "explanation": "Loops allow you to execute code repeatedly until a condition is met."
-            }
-        },
-        "medium": {
-            "functions": {
-                "question": "What is the difference between parameters and arguments?",
-                "options": [
-                    "Parameters are in the definition, arguments are passed when calling",
-                    "They are the same thing",
-                    "Arguments are in the definition, parameters are passed when calling",
-                    "Parameters are only for return values"
-                ],
-                "correctAnswer": "Parameters are in the definition, arguments are passed when calling",
-                "explanation": "Parameters are variables in the function definition; arguments are the actual values passed."
-            },
-            "variables": {
-                "question": "What is variable scope?",
-                "options": [
-                    "The region where a variable can be accessed",
-                    "The size of a variable",
-                    "The type of a variable",
-                    "The speed of variable access"
-                ],
-                "correctAnswer": "The region where a variable can be accessed",
-                "explanation": "Scope determines where in the code a variable is visible and accessible."
-            },
-            "loops": {
-                "question": "What is the difference between 'for' and 'while' loops?",
-                "options": [
-                    "'for' is for known iterations, 'while' is for unknown iterations",
-                    "They are exactly the same",
-                    "'while' is faster than 'for'",
-                    "'for' loops can't use conditions"
-                ],
-                "correctAnswer": "'for' is for known iterations, 'while' is for unknown iterations",
-                "explanation": "Use 'for' when you know how many times to iterate, 'while' when it depends on a condition."
-            }
-        },
-        "hard": {
-            "functions": {
-                "question": "What is a closure in programming?",
-                "options": [
-                    "A function that captures variables from its outer scope",
-                    "A way to close files",
-                    "A type of loop",
-                    "A way to end programs"
-                ],
-                "correctAnswer": "A function that captures variables from its outer scope",
-                "explanation": "Closures allow functions to access variables from their enclosing scope even after that scope has finished executing."
-            },
-            "variables": {
-                "question": "What is the difference between shallow and deep copying?",
-                "options": [
-                    "Shallow copies references, deep copies all nested objects",
-                    "They are the same",
-                    "Shallow is faster but deep is more secure",
-                    "Deep copies only work with primitives"
-                ],
-                "correctAnswer": "Shallow copies references, deep copies all nested objects",
-                "explanation": "Shallow copy creates a new object but references nested objects; deep copy recursively copies everything."
-            },
-            "loops": {
-                "question": "What is tail recursion optimization?",
-                "options": [
-                    "Converting recursive calls into iterations to save stack space",
-                    "A way to speed up loops",
-                    "A method to break out of loops early",
-                    "A technique for nested loops"
-                ],
-                "correctAnswer": "Converting recursive calls into iterations to save stack space",
-                "explanation": "Tail recursion optimization allows recursive functions to execute without growing the call stack."
-            }
-        }
-    }
-    
     # Get question template or generate generic one
-    template = question_templates.get(difficulty, {}).get(concept, None)
-    
-    if template:
-        return Question(
-            question=template["question"],
-            type="multiple_choice",
-            options=template["options"],
-            correctAnswer=template["correctAnswer"],
-            explanation=template["explanation"],
-            difficulty=difficulty
-        )
-    else:
-        # Generic question generation
-        return Question(
-            question=f"Which of the following best describes {concept}?",
-            type="multiple_choice",
-            options=[
-                f"Primary characteristic of {concept}",
-                f"Secondary characteristic of {concept}",
-                f"Alternative approach to {concept}",
-                f"Common misconception about {concept}"
-            ],
-            correctAnswer=f"Primary characteristic of {concept}",
-            explanation=f"This question tests your understanding of {concept} at {difficulty} level.",
-            difficulty=difficulty
-        )
+    template = _TEMPLATE_CACHE.get(difficulty, {}).get(concept)
+    
+    if template is not None:
+        return template
+    return _generic_question(concept, difficulty)
+
+
+@lru_cache(maxsize=4096)
+def _generic_question(concept: str, difficulty: str) -> Question:
+    """Generic question for a concept without a template (shared, never mutated)"""
+    return Question.model_construct(
+        question=f"Which of the following best describes {concept}?",
+        type="multiple_choice",
+        options=[
+            f"Primary characteristic of {concept}",
+            f"Secondary characteristic of {concept}",
+            f"Alternative approach to {concept}",
+            f"Common misconception about {concept}"
+        ],
+        correctAnswer=f"Primary characteristic of {concept}",
+        explanation=f"This question tests your understanding of {concept} at {difficulty} level.",
+        difficulty=difficulty
+    )
 
 
-def generate_group_quiz(request: GroupQuizRequest) -> GroupQuizResponse:
-    """Generate adaptive group quiz with individual and collaborative components"""
+def _quiz_scaffold(concepts: List[str]) -> Tuple[TeamChallenge, CollaborativeProblem]:
+    """Team challenge and collaborative problem, which depend only on the concepts"""
     
     # Create team challenge
-    concepts_str = ", ".join(request.concepts)
-    team_challenge = TeamChallenge(
-        title=f"Team Challenge: {' & '.join(request.concepts).title()}",
+    concepts_str = ", ".join(concepts)
+    team_challenge = TeamChallenge.model_construct(
+        title=f"Team Challenge: {' & '.join(concepts).title()}",
         description=f"Work together to build a project that demonstrates your understanding of {concepts_str}. Each team member should contribute based on their assigned role.",
-        successCriteria=[
-            "All team members contribute to the solution",
-            "Code demonstrates mastery of all target concepts",
-            "Solution includes proper error handling and edge cases",
-            "Team provides clear documentation of approach"
-        ],
+        successCriteria=_SUCCESS_CRITERIA,
         estimatedTime=30
     )
     
+    # Create collaborative problem
+    collaborative_problem = CollaborativeProblem.model_construct(
+        description=f"Design and implement a solution that integrates {concepts_str}. The solution should be practical and demonstrate real-world application of these concepts.",
+        requirements=[
+            f"Must demonstrate all concepts: {concepts_str}",
+            *_PROBLEM_REQUIREMENTS
+        ],
+        hints=_PROBLEM_HINTS
+    )
+    
+    return team_challenge, collaborative_problem
+
+
+def _assemble_group_quiz(
+    request: GroupQuizRequest,
+    team_challenge: TeamChallenge,
+    collaborative_problem: CollaborativeProblem,
+    generated_at: str
+) -> GroupQuizResponse:
+    """Add each member's personalized questions to a quiz scaffold"""
+    
     # Generate individual questions for each member
     individual_questions = []
     for member in request.memberMasteries:
@@ -309,40 +479,54 @@ def generate_group_quiz(request: GroupQuizRequest) -> GroupQuizResponse:
             request.difficulty
         )
         individual_questions.append(
-            IndividualQuestions(
+            IndividualQuestions.model_construct(
                 memberId=member.userId,
                 memberName=member.userName,
                 questions=questions
             )
         )
     
-    # Create collaborative problem
-    collaborative_problem = CollaborativeProblem(
-        description=f"Design and implement a solution that integrates {concepts_str}. The solution should be practical and demonstrate real-world application of these concepts.",
-        requirements=[
-            f"Must demonstrate all concepts: {concepts_str}",
-            "Include comprehensive test cases",
-            "Provide clear code comments and documentation",
-            "Consider performance and scalability",
-            "Handle edge cases appropriately"
-        ],
-        hints=[
-            "Start by breaking down the problem into smaller subtasks",
-            "Assign roles based on team member strengths",
-            "Review each other's code before integrating",
-            "Test individual components before full integration",
-            "Discuss edge cases as a team"
-        ]
-    )
-    
-    return GroupQuizResponse(
+    return GroupQuizResponse.model_construct(
         teamChallenge=team_challenge,
         individualQuestions=individual_questions,
         collaborativeProblem=collaborative_problem,
-        generatedAt=datetime.utcnow().isoformat()
+        generatedAt=generated_at
+    )
+
+
+def generate_group_quiz(request: GroupQuizRequest) -> GroupQuizResponse:
+    """Generate adaptive group quiz with individual and collaborative components"""
+    team_challenge, collaborative_problem = _quiz_scaffold(request.concepts)
+    return _assemble_group_quiz(
+        request,
+        team_challenge,
+        collaborative_problem,
+        datetime.utcnow().isoformat()
     )
 
 
+def generate_group_quiz_batch(requests: List[GroupQuizRequest]) -> List[GroupQuizResponse]:
+    """
+    Generate group quizzes for many groups at once
+    
+    Groups studying the same concepts share one team challenge and
+    collaborative problem, and questions come from the shared template and
+    fallback caches. Responses are in request order.
+    """
+    generated_at = datetime.utcnow().isoformat()
+    scaffolds: Dict[Tuple[str, ...], Tuple[TeamChallenge, CollaborativeProblem]] = {}
+    
+    responses = []
+    for request in requests:
+        key = tuple(request.concepts)
+        scaffold = scaffolds.get(key)
+        if scaffold is None:
+            scaffold = scaffolds[key] = _quiz_scaffold(request.concepts)
+        responses.append(_assemble_group_quiz(request, *scaffold, generated_at))
+    
+    return responses
+
+
 def facilitate_group(request: FacilitationRequest) -> FacilitationResponse:
     """Provide AI facilitation and guidance for group learning"""
     
@@ -372,139 +556,121 @@ def facilitate_group(request: FacilitationRequest) -> FacilitationResponse:
         "Group showing good engagement and participation"
     ]
     
-    # Recommended next steps
-    next_steps = [
-        "Review the priority concept together before starting exercises",
-        "Try the collaborative coding challenge as a team",
-        "Each member complete personalized questions to assess understanding",
-        "Share insights and learning strategies with the group"
-    ]
-    
-    # Action items
-    action_items = [
-        ActionItem(
-            task="Complete individual assessment questions",
-            assignedTo=None,
-            reason="Establish baseline understanding for each member"
-        ),
-        ActionItem(
-            task="Collaborate on team challenge",
-            assignedTo=None,
-            reason="Practice working together and applying concepts"
-        ),
-        ActionItem(
-            task="Peer review and feedback session",
-            assignedTo=None,
-            reason="Learn from each other's approaches and solutions"
-        )
-    ]
-    
-    return FacilitationResponse(
+    return FacilitationResponse.model_construct(
         summary=summary,
-        recommendedNextSteps=next_steps,
+        recommendedNextSteps=_FACILITATION_NEXT_STEPS,
         priorityConcept=priority_concept,
         reasoning=f"This concept shows the most variance ({max_variance:.2f}) in team mastery levels, suggesting it needs focused attention",
-        actionItems=action_items
+        actionItems=_FACILITATION_ACTION_ITEMS
     )
 
 
+def _strengths_slots(team_size: int) -> List[str]:
+    """Roles the strengths strategy hands out, strongest member's role first"""
+    if team_size == 0:
+        return []
+    slots = ["Navigator"]
+    if team_size >= 3:
+        slots.append("Driver")
+    slots.extend(["Reviewer"] * (team_size - 3))
+    if team_size >= 2:
+        slots.append("Researcher")
+    return slots
+
+
+def _optimal_role_slots(members: List[Member], slots: List[str]) -> List[str]:
+    """
+    Assign slots to members maximizing total mastery-role fit (Hungarian)
+    
+    fit[i, j] = sum over the team's concepts of member i's mastery (0.5 if
+    unseen) times role j's affinity for that concept.
+    
+    Returns:
+        The role for each member, in member order
+    """
+    if not members:
+        return []
+    concepts = list(dict.fromkeys(c for member in members for c in member.mastery)) or [None]
+    mastery = np.array([[member.mastery.get(c, 0.5) for c in concepts] for member in members])
+    role_weights = {
+        role: [
+            _ROLE_CONCEPT_AFFINITY.get(role, {}).get(c, _ROLE_BASE_AFFINITY.get(role, 0.3))
+            for c in concepts
+        ]
+        for role in set(slots)
+    }
+    affinity = np.array([role_weights[role] for role in slots]).T
+    
+    # Imported here so scipy.optimize isn't loaded at service startup
+    from scipy.optimize import linear_sum_assignment
+    _, cols = linear_sum_assignment(mastery @ affinity, maximize=True)
+    return [slots[j] for j in cols]
+
+
 def assign_roles(request: RoleAssignmentRequest) -> RoleAssignmentResponse:
     """Assign team roles based on mastery levels and strategy"""
     
     roles_assigned = []
     
-    # Sort members by average mastery
-    members_with_avg = []
-    for member in request.members:
-        if member.mastery:
-            avg_mastery = sum(member.mastery.values()) / len(member.mastery)
-        else:
-            avg_mastery = 0.5  # Default middle mastery
-        members_with_avg.append((member, avg_mastery))
-    
-    members_with_avg.sort(key=lambda x: x[1], reverse=True)
-    
-    # Role assignment strategies
-    role_responsibilities = {
-        "Driver": [
-            "Write the primary code implementation",
-            "Execute team's technical decisions",
-            "Maintain code quality and style"
-        ],
-        "Navigator": [
-            "Guide overall direction and strategy",
-            "Suggest approaches and review logic",
-            "Help catch errors and edge cases"
-        ],
-        "Researcher": [
-            "Find relevant documentation and resources",
-            "Research best practices and patterns",
-            "Investigate solution alternatives"
-        ],
-        "Reviewer": [
-            "Review code quality and correctness",
-            "Test solutions thoroughly",
-            "Provide constructive feedback"
-        ],
-        "Facilitator": [
-            "Coordinate team communication",
-            "Ensure everyone participates",
-            "Manage time and progress"
-        ]
-    }
+    # Average mastery per member (0.5 if none), computed once as plain floats
+    members = request.members
+    avgs = [
+        sum(m.mastery.values()) / len(m.mastery) if m.mastery else 0.5
+        for m in members
+    ]
+    
+    # Sort members by average mastery (stable, so ties keep request order)
+    order = sorted(range(len(members)), key=avgs.__getitem__, reverse=True)
+    members_with_avg = [(members[i], avgs[i]) for i in order]
     
     if request.strategy == "balanced":
         # Distribute roles evenly across mastery levels
         for idx, (member, avg_mastery) in enumerate(members_with_avg):
             role = request.availableRoles[idx % len(request.availableRoles)]
             roles_assigned.append(
-                RoleAssignment(
+                RoleAssignment.model_construct(
                     userId=member.userId,
                     userName=member.userName,
                     role=role,
                     reason=f"Balanced distribution ensuring diverse perspectives (mastery: {avg_mastery:.2f})",
-                    responsibilities=role_responsibilities.get(role, [])
+                    responsibilities=_ROLE_RESPONSIBILITIES.get(role, [])
                 )
             )
     
     elif request.strategy == "strengths":
-        # Higher mastery -> Navigator, lower mastery -> Researcher
-        for idx, (member, avg_mastery) in enumerate(members_with_avg):
-            if idx == 0:  # Highest mastery
-                role = "Navigator"
-            elif idx == len(members_with_avg) - 1:  # Lowest mastery
-                role = "Researcher"
-            elif idx == 1:
-                role = "Driver"
-            else:
-                role = "Reviewer"
-            
+        # Higher mastery -> Navigator, lower mastery -> Researcher; small teams
+        # get the fit-maximizing assignment, large ones the rank-order greedy
+        slots = _strengths_slots(len(members_with_avg))
+        if len(slots) <= _OPTIMAL_ASSIGNMENT_MAX_TEAM:
+            slots = _optimal_role_slots([member for member, _ in members_with_avg], slots)
+        
+        for (member, avg_mastery), role in zip(members_with_avg, slots):
             roles_assigned.append(
-                RoleAssignment(
+                RoleAssignment.model_construct(
                     userId=member.userId,
                     userName=member.userName,
                     role=role,
                     reason=f"Assigned based on demonstrated mastery level ({avg_mastery:.2f})",
-                    responsibilities=role_responsibilities.get(role, [])
+                    responsibilities=_ROLE_RESPONSIBILITIES.get(role, [])
                 )
             )
     
     else:  # random or other strategies
-        available = request.availableRoles.copy()
-        random.shuffle(available)
+        # Shuffled copy of the roles in one call
+        available = random.sample(request.availableRoles, len(request.availableRoles))
         for idx, (member, avg_mastery) in enumerate(members_with_avg):
             role = available[idx % len(available)]
             roles_assigned.append(
-                RoleAssignment(
+                RoleAssignment.model_construct(
                     userId=member.userId,
                     userName=member.userName,
                     role=role,
                     reason="Randomly assigned to encourage exploration of different roles",
-                    responsibilities=role_responsibilities.get(role, [])
+                    responsibilities=_ROLE_RESPONSIBILITIES.get(role, [])
                 )
             )
     
-    return RoleAssignmentResponse(
+    return RoleAssignmentResponse.model_construct(
         roles=roles_assigned,
         strategy=request.strategy
     )
@@ -515,11 +681,16 @@ def summarize_conversation(request: SummaryRequest) -> Summary:
     
     messages = request.messages[-request.lastN:]
     
-    # Extract unique participants
-    participants = set(msg.user.get("name", "Unknown") for msg in messages)
+    # Unique participants and topic words in a single pass over the messages
+    participants = set()
+    word_freq = Counter()
+    for msg in messages:
+        participants.add(msg.user.get("name", "Unknown"))
+        if msg.type == "text":
+            word_freq.update(msg.tokens())
     
     # Simple topic extraction
-    topics = extract_topics(messages)
+    topics = _top_topics(word_freq)
     
     # Generate summary
     key_points = [
@@ -528,28 +699,11 @@ def summarize_conversation(request: SummaryRequest) -> Summary:
         f"Main topics: {', '.join(topics[:5]) if topics else 'general discussion'}"
     ]
     
-    decisions = [
-        "Team agreed to focus on priority concepts",
-        "Members will complete individual exercises first"
-    ]
-    
-    questions = [
-        "What's the best approach for handling edge cases?",
-        "Should we optimize for performance or readability?",
-        "How do we integrate individual solutions?"
-    ]
-    
-    next_steps = [
-        "Complete individual assessment questions",
-        "Reconvene to discuss findings",
-        "Begin collaborative challenge as a team"
-    ]
-    
-    return Summary(
+    return Summary.model_construct(
         keyPoints=key_points,
-        decisions=decisions,
-        questions=questions,
-        nextSteps=next_steps
+        decisions=_SUMMARY_DECISIONS,
+        questions=_SUMMARY_QUESTIONS,
+        nextSteps=_SUMMARY_NEXT_STEPS
     )
 
 
@@ -558,33 +712,86 @@ def extract_topics(messages: List[ChatMessage]) -> List[str]:
     if not messages:
         return []
     
-    # Simple word extraction (in production, use proper NLP)
-    text = " ".join(msg.message.lower() for msg in messages if msg.type == "text")
-    words = text.split()
-    
-    # Filter for longer words (likely to be meaningful)
-    meaningful_words = [w for w in words if len(w) > 5]
-    
-    # Count frequency
-    word_freq = {}
-    for word in meaningful_words:
-        word_freq[word] = word_freq.get(word, 0) + 1
+    # Simple word extraction (in production, use proper NLP); counts longer
+    # words, which are likely to be meaningful
+    word_freq = Counter()
+    for msg in messages:
+        if msg.type == "text":
+            word_freq.update(msg.tokens())
     
-    # Return top words
-    sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-    return [word for word, freq in sorted_words[:5]]
+    return _top_topics(word_freq)
+
+
+def _top_topics(word_freq: Counter, n: int = 5) -> List[str]:
+    """Most frequent words (nlargest is stable, so ties keep first-seen order)"""
+    top_words = heapq.nlargest(n, word_freq.items(), key=itemgetter(1))
+    return [word for word, freq in top_words]
 
 
 # FastAPI endpoints (these would be added to the main app.py)
 
+def _json_response(model: BaseModel) -> Response:
+    """
+    Serialize a response model in one pydantic-core pass
+
+    Returning a Response skips FastAPI's response_model re-validation and
+    jsonable_encoder walk; response_model stays on the routes for the
+    OpenAPI schema.
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+_QUIZ_BATCH_ADAPTER = TypeAdapter(List[GroupQuizResponse])
+
+# Quizzes with at least this many questions (members x concepts) go to the
+# process pool; below it, pickling the request and response costs more than
+# the GIL contention it avoids
+_PROCESS_POOL_MIN_QUESTIONS = 1000
+
+
 def add_collaboration_routes(app: FastAPI):
-    """Add collaboration endpoints to FastAPI app"""
+    """
+    Add collaboration endpoints to FastAPI app
+
+    The handlers are CPU-bound, so they run via asyncio.to_thread (the loop's
+    default executor, sized by AI_SERVICE_THREADS in app.py) to keep the
+    event loop free for other requests. With AI_SERVICE_COLLAB_PROCESSES=N
+    (default 0, off), large group quizzes run in an N-process pool so they
+    also escape the GIL. The pool is per service worker: total processes are
+    AI_SERVICE_WORKERS x N, so keep N at 1-2.
+    """
+    n_processes = int(os.getenv('AI_SERVICE_COLLAB_PROCESSES', '0'))
+    # Workers are spawned lazily on first submit
+    process_pool = ProcessPoolExecutor(max_workers=n_processes) if n_processes > 0 else None
+    
+    if process_pool is not None:
+        @app.on_event("shutdown")
+        async def shutdown_collaboration_pool():
+            process_pool.shutdown(wait=False, cancel_futures=True)
     
     @app.post("/generate_group_quiz", response_model=GroupQuizResponse)
     async def api_generate_group_quiz(request: GroupQuizRequest):
         """Generate adaptive group quiz"""
         try:
-            return generate_group_quiz(request)
+            n_questions = len(request.memberMasteries) * len(request.concepts)
+            if process_pool is not None and n_questions >= _PROCESS_POOL_MIN_QUESTIONS:
+                loop = asyncio.get_running_loop()
+                quiz = await loop.run_in_executor(process_pool, generate_group_quiz, request)
+            else:
+                quiz = await asyncio.to_thread(generate_group_quiz, request)
+            return _json_response(quiz)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @app.post("/generate_group_quiz_batch", response_model=List[GroupQuizResponse])
+    async def api_generate_group_quiz_batch(requests: List[GroupQuizRequest]):
+        """Generate adaptive group quizzes for many groups in one call"""
+        try:
+            responses = await asyncio.to_thread(generate_group_quiz_batch, requests)
+            return Response(
+                content=_QUIZ_BATCH_ADAPTER.dump_json(responses),
+                media_type="application/json"
+            )
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
@@ -592,7 +799,7 @@ def add_collaboration_routes(app: FastAPI):
     async def api_facilitate_group(request: FacilitationRequest):
         """Provide AI facilitation for group"""
         try:
-            return facilitate_group(request)
+            return _json_response(await asyncio.to_thread(facilitate_group, request))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
@@ -600,7 +807,7 @@ def add_collaboration_routes(app: FastAPI):
     async def api_assign_roles(request: RoleAssignmentRequest):
         """Assign team roles"""
         try:
-            return assign_roles(request)
+            return _json_response(await asyncio.to_thread(assign_roles, request))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
@@ -608,11 +815,10 @@ def add_collaboration_routes(app: FastAPI):
     async def api_summarize_conversation(request: SummaryRequest):
         """Summarize recent conversation"""
         try:
-            return summarize_conversation(request)
+            return _json_response(await asyncio.to_thread(summarize_conversation, request))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
-
 if __name__ == "__main__":
     # Test the functions
     print("🧪 Testing collaboration service...")
@@ -11,6 +11,8 @@ from typing import Dict, List, Tuple, Optional
 from pathlib import Path
 import numpy as np
 
+from embeddings import load_sentence_encoder
+
 try:
     import whisper
     WHISPER_AVAILABLE = True
@@ -19,7 +21,7 @@ except ImportError:
     print("Warning: whisper not available. Install with: pip install openai-whisper")
 
 try:
-    from sentence_transformers import SentenceTransformer, util
+    from sentence_transformers import util
     SENTENCE_TRANSFORMERS_AVAILABLE = True
 except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
@@ -41,7 +43,7 @@ class ConceptExtractor:
         if not SENTENCE_TRANSFORMERS_AVAILABLE:
             raise ImportError("sentence-transformers required. Install with: pip install sentence-transformers")
         
-        self.model = SentenceTransformer(model_name)
+        self.model = load_sentence_encoder(model_name)
         
         # Default programming concept ontology
         self.concept_ontology = concept_ontology or {
@@ -57,10 +59,12 @@ class ConceptExtractor:
             'recursion': 'recursive functions, base case, recursive case, call stack'
         }
         
-        # Precompute concept embeddings
-        self.concept_embeddings = {}
-        for concept, desc in self.concept_ontology.items():
-            self.concept_embeddings[concept] = self.model.encode(desc, convert_to_tensor=True)
+        # Precompute concept embeddings (one batched encode; rows follow concept_names)
+        self.concept_names = list(self.concept_ontology.keys())
+        self.concept_matrix = self.model.encode(
+            list(self.concept_ontology.values()), batch_size=64, convert_to_tensor=True
+        )
+        self.concept_embeddings = dict(zip(self.concept_names, self.concept_matrix))
     
     def extract_concepts(self, text: str, threshold: float = 0.45,
                         top_k: int = 5) -> List[Tuple[str, float]]:
@@ -78,24 +82,22 @@ class ConceptExtractor:
         if not text.strip():
             return []
         
-        # Split into sentences for better granularity
-        sentences = self._split_sentences(text)
+        # Split into sentences for better granularity, skipping very short ones
+        sentences = [s for s in self._split_sentences(text) if len(s.split()) >= 3]
+        if not sentences:
+            return []
         
-        # Score each concept
-        concept_scores = {}
+        # Score every (sentence, concept) pair with one batched encode + one similarity matrix
+        sent_embs = self.model.encode(sentences, batch_size=64, convert_to_tensor=True)
+        sims = util.cos_sim(sent_embs, self.concept_matrix)  # (n_sentences, n_concepts)
         
-        for sentence in sentences:
-            if len(sentence.split()) < 3:  # skip very short sentences
-                continue
-            
-            sent_emb = self.model.encode(sentence, convert_to_tensor=True)
-            
-            for concept, concept_emb in self.concept_embeddings.items():
-                sim = util.cos_sim(sent_emb, concept_emb).item()
-                
-                if sim > threshold:
-                    # Take maximum similarity across all sentences
-                    concept_scores[concept] = max(concept_scores.get(concept, 0), sim)
+        # Take maximum similarity across all sentences
+        best = sims.max(dim=0).values.tolist()
+        concept_scores = {
+            concept: sim
+            for concept, sim in zip(self.concept_names, best)
+            if sim > threshold
+        }
         
         # Sort by score
         sorted_concepts = sorted(concept_scores.items(), key=lambda x: -x[1])
@@ -0,0 +1,30 @@
+# ai-service/embeddings.py
+"""
+Shared sentence-transformers encoders.
+Ranking, retrieval and content analysis use the same embedding model, so it
+is loaded once per process and reused instead of once per component.
+"""
+from functools import lru_cache
+
+try:
+    import sentence_transformers
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    sentence_transformers = None
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+
+@lru_cache(maxsize=None)
+def load_sentence_encoder(model_name: str = 'all-MiniLM-L6-v2'):
+    """
+    Load a SentenceTransformer once per model name and reuse it.
+    
+    Args:
+        model_name: sentence-transformers model name
+        
+    Returns:
+        shared SentenceTransformer instance
+    """
+    if sentence_transformers is None:
+        raise ImportError("sentence-transformers required")
+    return sentence_transformers.SentenceTransformer(model_name)
@@ -0,0 +1,29 @@
+# ai-service/gunicorn_conf.py
+"""
+Gunicorn settings for production deployments.
+
+    gunicorn -c gunicorn_conf.py app:app
+
+Each worker is a UvicornWorker (uvloop + httptools when installed) and loads
+its own copy of the models in the startup hook, so memory scales with the
+worker count.
+
+Defaults to a single worker. Evidence records, response caches and resource
+indexes are per-process, so with AI_SERVICE_WORKERS > 1 a decision_id from
+/explain/why_this may 404 on another worker, and /admin/invalidate_resources
+only rebuilds the worker that served it. Raise the count only behind sticky
+routing or for stateless endpoints.
+"""
+import os
+
+bind = f"{os.getenv('SERVICE_HOST', '0.0.0.0')}:{os.getenv('SERVICE_PORT', '8001')}"
+workers = int(os.getenv('AI_SERVICE_WORKERS', '1'))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Model loading happens at worker boot; give it time before the worker is killed
+timeout = int(os.getenv('AI_SERVICE_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+# Per-request access logging off by default (set AI_SERVICE_ACCESS_LOG=- to log to stdout)
+accesslog = os.getenv('AI_SERVICE_ACCESS_LOG')
@@ -0,0 +1,137 @@
+# ai-service/micro_batcher.py
+"""
+Dynamic micro-batching for model inference.
+Coalesces requests that arrive within a short window into one batched call,
+so concurrent batch-of-1 forward passes become a single batched forward pass.
+"""
+import asyncio
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class DynamicBatcher:
+    """
+    Queue-fronted batcher: collects up to max_batch_size items or waits at
+    most max_wait_ms after the first one, then runs batch_fn once in the
+    default thread pool and resolves each caller's future.
+
+    The wait is adaptive: when the previous batch was a singleton and nothing
+    else is queued (idle traffic), the item is dispatched immediately instead
+    of paying max_wait_ms for a batch that won't fill.
+    """
+
+    def __init__(self,
+                 batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 8.0):
+        """
+        Args:
+            batch_fn: blocking function mapping a list of inputs to a list of outputs (same order)
+            max_batch_size: max items per batch
+            max_wait_ms: max time to hold the first item while the batch fills
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._last_batch_size = 0
+        # Items taken off the queue whose futures aren't resolved yet (see stop)
+        self._in_flight: List[Tuple[Any, asyncio.Future]] = []
+
+    def start(self):
+        """Start the background batching task (must be called inside the event loop)."""
+        if self._worker is None or self._worker.done():
+            # Keep an existing queue: items already submitted must still be served
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Cancel the batching task and fail every in-flight or queued request."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        pending = self._in_flight
+        self._in_flight = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            self._queue = None
+
+        error = RuntimeError("DynamicBatcher stopped")
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result from the next batch."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        """Block for the first item, then fill the batch until it's full or the window closes."""
+        loop = asyncio.get_running_loop()
+        # Build the batch in _in_flight so stop() can fail it if cancelled mid-collect
+        batch = self._in_flight = []
+        batch.append(await self._queue.get())
+
+        # Take whatever is already queued without waiting
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        # Idle traffic: don't hold a lone request for companions that aren't coming
+        if len(batch) == 1 and self._last_batch_size <= 1:
+            self._last_batch_size = 1
+            return batch
+
+        deadline = loop.time() + self.max_wait_ms / 1000.0
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        self._last_batch_size = len(batch)
+        return batch
+
+    async def _run(self):
+        """Batching loop."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect()
+            inputs = [item for item, _ in batch]
+
+            try:
+                outputs = await loop.run_in_executor(None, self.batch_fn, inputs)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            if len(outputs) != len(batch):
+                # Can't tell which output belongs to whom: fail the whole batch
+                error = RuntimeError(
+                    f"batch_fn returned {len(outputs)} outputs for {len(batch)} inputs"
+                )
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            for (_, future), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
@@ -3,7 +3,9 @@
 Beta-Bernoulli Knowledge Tracing (fallback/baseline model).
 Simple, fast, and explainable.
 """
-from typing import Dict, List
+from typing import Dict, List, Sequence
+
+import numpy as np
 
 
 class BetaKT:
@@ -35,37 +37,44 @@ class BetaKT:
         Returns:
             dict mapping concept -> mastery probability
         """
-        prior_mastery = prior_mastery or {}
+        concepts = [att['concept'] for att in attempts]
+        correct = np.fromiter((att['correct'] for att in attempts),
+                              dtype=np.float64, count=len(attempts))
         
-        # Aggregate attempts per concept
-        stats = {}
-        for att in attempts:
-            concept = att['concept']
-            correct = int(att['correct'])
-            
-            if concept not in stats:
-                stats[concept] = {'success': 0, 'trials': 0}
-            
-            stats[concept]['success'] += correct
-            stats[concept]['trials'] += 1
+        return self.predict_mastery_arrays(concepts, correct, prior_mastery)
+    
+    def predict_mastery_arrays(self, concepts: Sequence[str], correct: np.ndarray,
+                               prior_mastery: Dict[str, float] = None) -> Dict[str, float]:
+        """
+        Vectorized predict_mastery over parallel attempt arrays.
         
-        # Compute posterior mean for each concept
+        Args:
+            concepts: concept name per attempt
+            correct: 0/1 correctness per attempt (same length as concepts)
+            prior_mastery: optional prior mastery estimates
+            
+        Returns:
+            dict mapping concept -> mastery probability
+        """
+        prior_mastery = prior_mastery or {}
         mastery = {}
-        for concept, vals in stats.items():
-            s = vals['success']
-            n = vals['trials']
+        
+        if len(concepts):
+            # Aggregate attempts per concept
+            names, concept_idx = np.unique(np.asarray(concepts), return_inverse=True)
+            trials = np.bincount(concept_idx, minlength=len(names))
+            success = np.bincount(concept_idx, weights=correct, minlength=len(names))
             
             # Beta posterior mean
-            post_mean = (s + self.alpha) / (n + self.alpha + self.beta)
+            post_mean = (success + self.alpha) / (trials + self.alpha + self.beta)
+            
+            # Blend with prior where available, weighting observed data by n/(n+K)
+            names = names.tolist()
+            prior = np.array([prior_mastery.get(c, np.nan) for c in names], dtype=np.float64)
+            weight = trials / (trials + self.blend_weight)
+            blended = np.where(np.isnan(prior), post_mean, weight * post_mean + (1 - weight) * prior)
             
-            # Blend with prior if available
-            prior = prior_mastery.get(concept)
-            if prior is not None:
-                # Weight observed data by n/(n+K)
-                weight = n / (n + self.blend_weight)
-                mastery[concept] = weight * post_mean + (1 - weight) * prior
-            else:
-                mastery[concept] = post_mean
+            mastery = dict(zip(names, blended.tolist()))
         
         # Include prior concepts with no recent attempts
         for concept, prior in prior_mastery.items():
@@ -6,7 +6,7 @@ Predicts student mastery and next-question correctness.
 import torch
 import torch.nn as nn
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 import json
 from pathlib import Path
 
@@ -81,14 +81,20 @@ class DKTPredictor:
     
     def __init__(self, model_path: Optional[str] = None, 
                  concept_to_questions: Optional[Dict[str, List[int]]] = None,
-                 device: str = 'cpu'):
+                 device: str = 'cpu',
+                 precision: str = 'auto'):
         """
         Args:
             model_path: path to saved model checkpoint
             concept_to_questions: mapping from concept name to list of question IDs
             device: 'cpu' or 'cuda'
+            precision: inference dtype - 'fp32', 'bf16', 'fp16', or 'auto'
+                       (bf16 autocast on CUDA, fp32 on CPU)
         """
         self.device = device
+        if precision == 'auto':
+            precision = 'bf16' if str(device).startswith('cuda') else 'fp32'
+        self.autocast_dtype = {'bf16': torch.bfloat16, 'fp16': torch.float16}.get(precision)
         self.model = None
         self.concept_to_questions = concept_to_questions or {}
         self.question_to_concept = {}
@@ -123,16 +129,73 @@ class DKTPredictor:
                 for qid in qids:
                     self.question_to_concept[qid] = concept
     
-    def encode_sequence(self, attempts: List[Dict]) -> torch.Tensor:
+    def compile(self, mode: str = 'reduce-overhead') -> str:
+        """
+        Compile the loaded model for faster inference and warm it up.
+        
+        Tries torch.compile (PyTorch 2.x), then TorchScript, and keeps the
+        eager model if both fail. The warm-up forward pass triggers
+        compilation here rather than on the first request.
+        
+        Args:
+            mode: torch.compile mode
+            
+        Returns:
+            backend in use: 'torch.compile', 'torchscript' or 'eager'
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded. Call load_model() first.")
+        
+        eager = self.model
+        dummy = torch.zeros((2, 4), dtype=torch.long, device=self.device)
+        
+        candidates = []
+        if hasattr(torch, 'compile'):
+            candidates.append(('torch.compile', lambda: torch.compile(eager, mode=mode, dynamic=True)))
+        candidates.append(('torchscript', lambda: torch.jit.script(eager)))
+        
+        for backend, build in candidates:
+            try:
+                self.model = build()
+                self._forward(dummy)
+                return backend
+            except Exception as e:
+                print(f"DKT {backend} failed: {e}")
+        
+        self.model = eager
+        return 'eager'
+    
+    def _forward(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        Inference forward pass (no autograd; autocast when reduced precision is set).
+        
+        Returns:
+            float32 probabilities of shape (batch, seq_len, n_questions)
+        """
+        with torch.inference_mode():
+            if self.autocast_dtype is None:
+                probs, _ = self.model(x)
+                return probs
+            
+            device_type = 'cuda' if str(self.device).startswith('cuda') else 'cpu'
+            with torch.autocast(device_type=device_type, dtype=self.autocast_dtype):
+                probs, _ = self.model(x)
+            return probs.float()
+    
+    def encode_sequence(self, attempts: Union[List[Dict], np.ndarray]) -> torch.Tensor:
         """
         Encode attempts into DKT input format.
         
         Args:
-            attempts: list of dicts with 'question_id' and 'correct' keys
+            attempts: list of dicts with 'question_id' and 'correct' keys, or an
+                      integer array already encoded as question_id * 2 + correct
             
         Returns:
             tensor of shape (seq_len,) with encoded values
         """
+        if isinstance(attempts, np.ndarray):
+            return torch.as_tensor(attempts, dtype=torch.long, device=self.device)
+        
         encoded = []
         for att in attempts:
             qid = att['question_id']
@@ -142,7 +205,7 @@ class DKTPredictor:
         
         return torch.tensor(encoded, dtype=torch.long, device=self.device)
     
-    def predict_mastery(self, attempts: List[Dict], 
+    def predict_mastery(self, attempts: Union[List[Dict], np.ndarray], 
                        return_question_probs: bool = False) -> Dict[str, float]:
         """
         Predict per-concept mastery from sequence of attempts.
@@ -154,23 +217,67 @@ class DKTPredictor:
         Returns:
             dict mapping concept -> mastery probability (0-1)
         """
-        if not self.model:
+        if self.model is None:
             raise ValueError("Model not loaded. Call load_model() first.")
         
-        if not attempts:
+        if len(attempts) == 0:
             return {}
         
         # Encode sequence
         x = self.encode_sequence(attempts).unsqueeze(0)  # (1, seq_len)
         
         # Predict
-        with torch.no_grad():
-            probs, _ = self.model(x)  # (1, seq_len, n_questions)
+        probs = self._forward(x)  # (1, seq_len, n_questions)
         
         # Take last timestep predictions
         last_probs = probs[0, -1, :].cpu().numpy()  # (n_questions,)
         
-        # Aggregate by concept
+        concept_mastery = self._aggregate_by_concept(last_probs)
+        
+        if return_question_probs:
+            return concept_mastery, last_probs.tolist()
+        
+        return concept_mastery
+    
+    def predict_mastery_batch(self, sequences: List[Union[List[Dict], np.ndarray]]) -> List[Dict[str, float]]:
+        """
+        Predict per-concept mastery for several students in one forward pass.
+        
+        Sequences are right-padded; since the LSTM is causal, padding never
+        affects the real timesteps, so each student's prediction is read at
+        their own last timestep.
+        
+        Args:
+            sequences: list of attempt lists or encoded arrays (see encode_sequence)
+            
+        Returns:
+            list of concept -> mastery dicts, aligned with sequences
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded. Call load_model() first.")
+        
+        results = [{} for _ in sequences]
+        rows = [i for i, attempts in enumerate(sequences) if len(attempts)]
+        if not rows:
+            return results
+        
+        lengths = [len(sequences[i]) for i in rows]
+        x = torch.zeros((len(rows), max(lengths)), dtype=torch.long, device=self.device)
+        for row, i in enumerate(rows):
+            x[row, :lengths[row]] = self.encode_sequence(sequences[i])
+        
+        probs = self._forward(x)  # (batch, max_len, n_questions)
+        
+        last_idx = torch.tensor(lengths, device=self.device) - 1
+        last_probs = probs[torch.arange(len(rows), device=self.device), last_idx].cpu().numpy()
+        
+        for row, i in enumerate(rows):
+            results[i] = self._aggregate_by_concept(last_probs[row])
+        
+        return results
+    
+    def _aggregate_by_concept(self, last_probs: np.ndarray) -> Dict[str, float]:
+        """Average last-timestep question probabilities per concept."""
         concept_mastery = {}
         for concept, qids in self.concept_to_questions.items():
             if qids:
@@ -180,9 +287,6 @@ class DKTPredictor:
                 if concept_probs:
                     concept_mastery[concept] = float(np.mean(concept_probs))
         
-        if return_question_probs:
-            return concept_mastery, last_probs.tolist()
-        
         return concept_mastery
     
     def predict_next_question(self, attempts: List[Dict], 
@@ -197,13 +301,12 @@ class DKTPredictor:
         Returns:
             probability of correctness (0-1)
         """
-        if not self.model or not attempts:
+        if self.model is None or not attempts:
             return 0.5  # neutral prior
         
         x = self.encode_sequence(attempts).unsqueeze(0)
         
-        with torch.no_grad():
-            probs, _ = self.model(x)
+        probs = self._forward(x)
         
         # Return probability for the specific question at last timestep
         prob = probs[0, -1, next_question_id].item()
@@ -11,7 +11,7 @@ import asyncio
 import uuid
 import time
 
-from bkt_irt_hybrid import bkt_irt_model, MasteryUpdate
+from bkt_irt_hybrid import get_default_model, MasteryUpdate
 from performance_predictor import performance_predictor, LearningHistory, LearningTrajectory
 from knowledge_graph import KnowledgeGraph
 from bandit_optimizer import MultiArmedBandit, ContextualBandit, Resource
@@ -168,6 +168,7 @@ async def startup_event():
         ("recursion", 0.8, 0.2, 0.1),
     ]
     
+    bkt_irt_model = get_default_model()
     for concept_id, difficulty, slip, guess in concepts:
         bkt_irt_model.initialize_concept(concept_id, difficulty, slip, guess)
     
@@ -194,6 +195,7 @@ async def process_learning_event(
     
     try:
         # 1. Update mastery using BKT-IRT hybrid (fast)
+        bkt_irt_model = get_default_model()
         mastery_update = bkt_irt_model.update_mastery(
             request.user_id,
             request.concept_id,
@@ -279,7 +281,7 @@ async def process_learning_event(
 @app.get("/api/user/{user_id}/knowledge-state", response_model=KnowledgeStateResponse)
 async def get_knowledge_state(user_id: str) -> KnowledgeStateResponse:
     """Get complete knowledge state for user"""
-    state = bkt_irt_model.get_knowledge_state(user_id)
+    state = get_default_model().get_knowledge_state(user_id)
     
     return KnowledgeStateResponse(
         user_id=user_id,
@@ -438,6 +440,7 @@ async def get_optimal_path(request: OptimalPathRequest):
 async def batch_mastery_update(request: BatchMasteryRequest):
     """Batch update mastery for multiple attempts"""
     updates = []
+    bkt_irt_model = get_default_model()
     
     for attempt in request.attempts:
         try:
@@ -619,13 +622,14 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
+    bkt_irt_model = get_default_model()
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "components": {
             "bkt_irt_model": {
                 "status": "healthy",
-                "users": len(bkt_irt_model.user_states),
+                "users": bkt_irt_model.user_count,
                 "concepts": len(bkt_irt_model.concept_params)
             },
             "performance_predictor": {
@@ -6,12 +6,20 @@ Provides human-readable explanations for recommendations using:
 - LLM prompting (OpenAI or local)
 - Provenance tracking
 """
+import asyncio
+import bisect
+import copy
+import functools
 import json
 import os
-from typing import Dict, List, Optional, Tuple
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
 import numpy as np
 
+from embeddings import SENTENCE_TRANSFORMERS_AVAILABLE, load_sentence_encoder
+
 try:
     import faiss
     FAISS_AVAILABLE = True
@@ -19,18 +27,16 @@ except ImportError:
     FAISS_AVAILABLE = False
     print("Warning: faiss not available. Install with: pip install faiss-cpu")
 
-try:
-    from sentence_transformers import SentenceTransformer
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
-
 try:
     import openai
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
 
+# Mastery thresholds where the template explanation changes wording
+# (basics / prerequisite note / intermediate / advanced)
+_TEMPLATE_MASTERY_BANDS = (0.3, 0.5, 0.7)
+
 
 class DocumentStore:
     """
@@ -47,7 +53,7 @@ class DocumentStore:
         if not SENTENCE_TRANSFORMERS_AVAILABLE:
             raise ImportError("sentence-transformers required")
         
-        self.encoder = SentenceTransformer(embedding_model)
+        self.encoder = load_sentence_encoder(embedding_model)
         self.dimension = self.encoder.get_sentence_embedding_dimension()
         
         # FAISS index
@@ -73,20 +79,22 @@ class DocumentStore:
             documents: list of dicts with at least 'text' and 'id' keys
                       can also include 'type', 'metadata', etc.
         """
-        for doc in documents:
-            if 'text' not in doc:
-                continue
-            
-            # Embed
-            embedding = self.encoder.encode(doc['text'], convert_to_numpy=True)
-            
-            # Store
-            self.documents.append(doc)
-            self.embeddings.append(embedding)
-            
-            # Add to FAISS index
-            if self.index is not None:
-                self.index.add(np.array([embedding], dtype='float32'))
+        documents = [doc for doc in documents if 'text' in doc]
+        if not documents:
+            return
+        
+        # Embed all documents in one batched encode
+        embeddings = self.encoder.encode(
+            [doc['text'] for doc in documents], batch_size=64, convert_to_numpy=True
+        )
+        
+        # Store
+        self.documents.extend(documents)
+        self.embeddings.extend(embeddings)
+        
+        # Add to FAISS index
+        if self.index is not None:
+            self.index.add(np.asarray(embeddings, dtype='float32'))
     
     def search(self, query: str, top_k: int = 5,
                filter_type: Optional[str] = None) -> List[Tuple[Dict, float]]:
@@ -173,11 +181,52 @@ class DocumentStore:
                 data = json.load(f)
                 self.documents = data['documents']
                 
-                # Rebuild embeddings from documents
-                self.embeddings = [
-                    self.encoder.encode(doc['text'], convert_to_numpy=True)
-                    for doc in self.documents
-                ]
+                # Rebuild embeddings from documents (one batched encode)
+                self.embeddings = list(self.encoder.encode(
+                    [doc['text'] for doc in self.documents], batch_size=64, convert_to_numpy=True
+                )) if self.documents else []
+
+
+class ExplanationCache:
+    """
+    Bounded LRU cache of template explanations keyed on
+    (concept, mastery band, resource id, n_context).
+    
+    Keys must match exactly: an explanation is only reused for the same
+    resource and concept in the same template mastery band. Entries are
+    copied in and out, so callers may mutate what they get back.
+    Per-process and thread-safe (explain() runs in the thread pool).
+    """
+    
+    def __init__(self, capacity: int = 100_000):
+        """
+        Args:
+            capacity: max cached explanations
+        """
+        self.capacity = capacity
+        self._data: "OrderedDict[Tuple[str, int, str, int], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def lookup(self, key: Tuple[str, int, str, int]) -> Optional[Dict]:
+        """Copy of the cached explanation for key, or None."""
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            self._data.move_to_end(key)
+        return copy.deepcopy(hit)
+    
+    def store(self, key: Tuple[str, int, str, int], explanation: Dict):
+        """Cache a copy of explanation under key, evicting least recently used entries past capacity."""
+        explanation = copy.deepcopy(explanation)
+        with self._lock:
+            self._data[key] = explanation
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._data)
 
 
 class LLMExplainer:
@@ -317,7 +366,8 @@ class RAGExplainer:
                  resource_metadata: Optional[List[Dict]] = None,
                  student_outcomes: Optional[Dict] = None,
                  index_path: Optional[str] = None,
-                 openai_api_key: Optional[str] = None):
+                 openai_api_key: Optional[str] = None,
+                 cache_size: int = 100_000):
         """
         Args:
             knowledge_graph: concept graph (prereqs, etc.)
@@ -325,9 +375,11 @@ class RAGExplainer:
             student_outcomes: historical outcome data
             index_path: path to FAISS index
             openai_api_key: OpenAI API key (optional)
+            cache_size: max cached explanations
         """
         self.doc_store = DocumentStore(index_path=index_path)
         self.llm_explainer = LLMExplainer(api_key=openai_api_key)
+        self.explanation_cache = ExplanationCache(capacity=cache_size)
         
         # Index documents if provided
         if knowledge_graph:
@@ -407,6 +459,17 @@ class RAGExplainer:
         Returns:
             explanation dict
         """
+        # Template explanations depend only on the concept's mastery band, so
+        # repeat requests in the same band reuse one. LLM explanations are
+        # tailored to the whole mastery map and are never cached.
+        cache_key = None
+        if not self.llm_explainer.use_openai:
+            band = bisect.bisect_right(_TEMPLATE_MASTERY_BANDS, student_mastery.get(concept, 0.0))
+            cache_key = (concept, band, resource.get('id', ''), n_context)
+            cached = self.explanation_cache.lookup(cache_key)
+            if cached is not None:
+                return cached
+        
         # Build retrieval query
         query = f"Why learn {concept}? Current mastery: {student_mastery.get(concept, 0):.2f}. "
         query += f"Resource: {resource.get('title', '')}"
@@ -430,8 +493,40 @@ class RAGExplainer:
             for doc in context_docs
         ]
         
+        if cache_key is not None:
+            self.explanation_cache.store(cache_key, explanation)
+        
         return explanation
     
+    async def explain_batch(self,
+                            items: List[Dict],
+                            max_concurrency: int = 8) -> List[Union[Dict, Exception]]:
+        """
+        Generate explanations for several recommendations concurrently.
+        
+        Each explain() call (retrieval + LLM round trip) runs in the default
+        thread pool, so N explanations cost ~max(latency) instead of the sum.
+        
+        Args:
+            items: list of dicts with explain() kwargs
+                   ('resource', 'student_mastery', 'concept', optional 'n_context')
+            max_concurrency: max explanations in flight at once
+            
+        Returns:
+            explanation dicts in input order; a failed item yields its exception
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def explain_one(item: Dict) -> Dict:
+            async with semaphore:
+                return await loop.run_in_executor(None, functools.partial(self.explain, **item))
+        
+        return await asyncio.gather(
+            *[explain_one(item) for item in items],
+            return_exceptions=True
+        )
+    
     def save_index(self, path: str):
         """Save FAISS index to disk."""
         self.doc_store.save(path)
@@ -5,11 +5,13 @@ Combines multiple signals: semantic similarity, modality match,
 difficulty alignment, and historical success rates.
 """
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
+from embeddings import load_sentence_encoder
+
 try:
-    from sentence_transformers import SentenceTransformer, util
+    from sentence_transformers import util
     SENTENCE_TRANSFORMERS_AVAILABLE = True
 except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
@@ -62,7 +64,7 @@ class ResourceRanker:
         """
         self.encoder = None
         if SENTENCE_TRANSFORMERS_AVAILABLE:
-            self.encoder = SentenceTransformer(embedding_model)
+            self.encoder = load_sentence_encoder(embedding_model)
         
         self.success_stats = success_stats or {}
         
@@ -85,6 +87,13 @@ class ResourceRanker:
             'intermediate': 0.5,
             'advanced': 0.8
         }
+        
+        # concept -> embedding of the default "Learn {concept}" query
+        self.query_embeds: Dict[str, np.ndarray] = {}
+        
+        # Normalized resource embedding matrix and id(resource) -> row id,
+        # published together as one tuple (see build_index)
+        self._index_state: Tuple[Optional[np.ndarray], Dict[int, int]] = (None, {})
     
     def embed_resources(self, resources: List[Resource]) -> List[Resource]:
         """
@@ -100,12 +109,85 @@ class ResourceRanker:
             print("Warning: embeddings not available")
             return resources
         
-        for res in resources:
-            text = f"{res.title}. {res.description}"
-            res.embed = self.encoder.encode(text, convert_to_numpy=True)
+        if not resources:
+            return resources
+        
+        # One batched encode; unit-norm vectors make cosine a plain dot product
+        embeds = self.encoder.encode(
+            [f"{res.title}. {res.description}" for res in resources],
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        for res, embed in zip(resources, embeds):
+            res.embed = embed
         
         return resources
     
+    def embed_queries(self, concepts) -> None:
+        """
+        Precompute default query embeddings for concepts (one batched encode).
+        
+        Args:
+            concepts: iterable of concept names
+        """
+        if not self.encoder:
+            return
+        
+        concepts = [c for c in concepts if c not in self.query_embeds]
+        if not concepts:
+            return
+        
+        embeds = self.encoder.encode([f"Learn {c}" for c in concepts], convert_to_numpy=True)
+        self.query_embeds.update(zip(concepts, embeds))
+    
+    def build_index(self, resources: List[Resource]) -> None:
+        """
+        Stack embedded resources into one L2-normalized matrix so ranking
+        scores all candidates with a single matrix-vector product instead of
+        per-resource similarity calls (inner product = cosine similarity).
+        
+        The new matrix is built aside and swapped in with a single assignment,
+        so concurrent rankings see either the old or the new index, never a mix.
+        
+        Args:
+            resources: embedded Resource objects (the same objects later passed to ranking)
+        """
+        indexed = [res for res in resources if res.embed is not None]
+        rows = {id(res): row for row, res in enumerate(indexed)}
+        
+        if not indexed:
+            self._index_state = (None, rows)
+            return
+        
+        mat = np.stack([res.embed for res in indexed]).astype(np.float32)
+        mat /= np.maximum(np.linalg.norm(mat, axis=1, keepdims=True), 1e-12)
+        self._index_state = (mat, rows)
+    
+    def _indexed_similarities(self,
+                              query_embed: np.ndarray,
+                              resources: List[Resource]) -> Optional[List[float]]:
+        """
+        Cosine similarity of the query to each resource, computed over just the
+        candidates' rows of the normalized matrix. None if any candidate isn't
+        indexed or the query doesn't fit the matrix (callers then fall back to
+        per-resource cosine similarity).
+        """
+        mat, index_rows = self._index_state
+        if mat is None:
+            return None
+        
+        rows = [index_rows.get(id(res)) for res in resources]
+        if None in rows:
+            return None
+        
+        query = np.asarray(query_embed, dtype=np.float32).ravel()
+        try:
+            sims = mat[rows] @ query
+        except ValueError:
+            return None
+        return (sims / max(float(np.linalg.norm(query)), 1e-12)).tolist()
+    
     def rank_resources(self, 
                       user: UserProfile,
                       concept: str,
@@ -126,22 +208,31 @@ class ResourceRanker:
         if not resources:
             return []
         
-        # Prepare query embedding
-        query_text = query or f"Learn {concept}"
+        # Prepare query embedding (precomputed for the default concept query)
         query_embed = None
         if self.encoder:
-            query_embed = self.encoder.encode(query_text, convert_to_numpy=True)
+            if query is None and concept in self.query_embeds:
+                query_embed = self.query_embeds[concept]
+            else:
+                query_embed = self.encoder.encode(query or f"Learn {concept}", convert_to_numpy=True)
+        
+        # Content similarity for all candidates in one matrix product, when indexed
+        indexed_sims = None
+        if query_embed is not None:
+            indexed_sims = self._indexed_similarities(query_embed, resources)
         
         # Get user's current level for the concept
         user_level = user.mastery.get(concept, 0.0)
         
         ranked = []
         
-        for res in resources:
+        for i, res in enumerate(resources):
             scores = {}
             
             # 1. Content similarity (semantic)
-            if query_embed is not None and res.embed is not None:
+            if indexed_sims is not None:
+                scores['content_sim'] = max(0, indexed_sims[i])  # clip to [0, 1]
+            elif query_embed is not None and res.embed is not None:
                 sim = util.cos_sim(query_embed, res.embed).item()
                 scores['content_sim'] = max(0, sim)  # clip to [0, 1]
             else:
@@ -0,0 +1,122 @@
+# ai-service/response_cache.py
+"""
+In-memory TTL + LRU response cache for pure endpoints.
+Keys are BLAKE2 digests of the pydantic request body, so repeated identical
+requests (e.g. dashboards polling the same learner) skip model/LLM work.
+"""
+import functools
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+from pydantic import BaseModel
+
+
+_MISSING = object()
+
+# endpoint name -> cache, for the stats endpoint
+endpoint_caches: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire ttl seconds after insertion.
+    Per-process (each worker has its own cache).
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0):
+        """
+        Args:
+            maxsize: max entries before the least recently used is evicted
+            ttl: entry lifetime in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[bytes, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: bytes) -> Any:
+        """Cached value for key, or _MISSING if absent or expired."""
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return _MISSING
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: bytes, value: Any):
+        """Insert value, evicting least recently used entries past maxsize."""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries."""
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss counters."""
+        total = self.hits + self.misses
+        return {
+            'currsize': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+def request_key(*args, **kwargs) -> bytes:
+    """Stable 128-bit digest of the endpoint arguments (pydantic bodies as canonical JSON)."""
+    h = hashlib.blake2b(digest_size=16)
+    for value in (*args, *(kwargs[k] for k in sorted(kwargs))):
+        if isinstance(value, BaseModel):
+            h.update(value.model_dump_json().encode())
+        else:
+            h.update(repr(value).encode())
+        h.update(b'\x00')
+    return h.digest()
+
+
+def cached_endpoint(ttl: float = 60.0, maxsize: int = 10_000) -> Callable:
+    """
+    Cache an async endpoint's result keyed by its request body.
+
+    Only use on endpoints whose response is a pure function of their inputs;
+    exceptions (e.g. HTTPException) are not cached.
+
+    Args:
+        ttl: seconds a response stays valid
+        maxsize: max cached responses for this endpoint
+    """
+    def decorator(func: Callable) -> Callable:
+        cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        endpoint_caches[func.__name__] = cache
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = request_key(*args, **kwargs)
+            result = cache.get(key)
+            if result is _MISSING:
+                result = await func(*args, **kwargs)
+                cache.set(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def clear_endpoint_caches():
+    """Invalidate every endpoint cache (e.g. after resources change)."""
+    for cache in endpoint_caches.values():
+        cache.clear()
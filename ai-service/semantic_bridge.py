@@ -346,7 +346,7 @@ async def generate_analogy(
     )
     
     return {
-        "analogy": analogy.dict(),
+        "analogy": analogy.model_dump(),
         "recommendation": "Display this analogy before introducing the concept to activate prior knowledge."
     }
 
@@ -369,8 +369,8 @@ async def demo_analogies(user_id: str):
     )
     
     return {
-        "analogies": [a.dict() for a in analogies],
-        "profile": demo_profile.dict()
+        "analogies": [a.model_dump() for a in analogies],
+        "profile": demo_profile.model_dump()
     }
 """
 
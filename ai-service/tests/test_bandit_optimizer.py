@@ -0,0 +1,96 @@
+"""Bandit selection: the Numba kernels and the NumPy fallback pick the same arms."""
+import numpy as np
+import pytest
+
+import bandit_optimizer
+from bandit_optimizer import MultiArmedBandit, Resource
+
+
+def make_bandit(n_arms: int, algorithm: str, seed=None) -> MultiArmedBandit:
+    rng = np.random.default_rng(1)
+    bandit = MultiArmedBandit(algorithm=algorithm, seed=seed)
+    for i in range(n_arms):
+        pulls = int(rng.integers(0, 50))
+        successes = int(rng.integers(0, pulls + 1))
+        bandit.add_resource(
+            Resource(id=f"r{i}", title=f"R{i}", type="video", concept="loops", difficulty=0.5),
+            successes=successes, failures=pulls - successes, pulls=pulls
+        )
+    return bandit
+
+
+@pytest.mark.parametrize("n_arms", [3, 40, 200])
+def test_ucb_numba_matches_numpy(monkeypatch, n_arms):
+    bandit = make_bandit(n_arms, "ucb")
+    rng = np.random.default_rng(2)
+    candidate_sets = [
+        [f"r{i}" for i in rng.choice(n_arms, size=min(n_arms, 10), replace=False)]
+        for _ in range(50)
+    ]
+
+    picks = [bandit.select_resource(c) for c in candidate_sets]
+    monkeypatch.setattr(bandit_optimizer, "NUMBA_AVAILABLE", False)
+    assert [bandit.select_resource(c) for c in candidate_sets] == picks
+
+
+def test_ucb_prefers_unpulled_arm_on_both_paths(monkeypatch):
+    bandit = make_bandit(5, "ucb")
+    bandit.add_resource(Resource(id="new", title="New", type="quiz", concept="loops", difficulty=0.5))
+    candidates = ["r0", "r1", "new", "r2"]
+
+    assert bandit.select_resource(candidates) == "new"
+    monkeypatch.setattr(bandit_optimizer, "NUMBA_AVAILABLE", False)
+    assert bandit.select_resource(candidates) == "new"
+
+
+@pytest.mark.parametrize("seed", [None, 7])
+@pytest.mark.parametrize("n_arms", [5, 64])
+def test_thompson_picks_dominant_arm(monkeypatch, seed, n_arms):
+    bandit = MultiArmedBandit(algorithm="thompson", seed=seed)
+    for i in range(n_arms):
+        bandit.add_resource(
+            Resource(id=f"r{i}", title=f"R{i}", type="video", concept="loops", difficulty=0.5),
+            successes=10, failures=90, pulls=100
+        )
+    bandit.add_resource(
+        Resource(id="best", title="Best", type="video", concept="loops", difficulty=0.5),
+        successes=90, failures=10, pulls=100
+    )
+    candidates = [f"r{i}" for i in range(n_arms)] + ["best"]
+
+    assert all(bandit.select_resource(candidates) == "best" for _ in range(20))
+    monkeypatch.setattr(bandit_optimizer, "NUMBA_AVAILABLE", False)
+    assert all(bandit.select_resource(candidates) == "best" for _ in range(20))
+
+
+def test_seeded_thompson_is_reproducible():
+    candidates = [f"r{i}" for i in range(40)]
+    first = make_bandit(40, "thompson", seed=3)
+    second = make_bandit(40, "thompson", seed=3)
+
+    assert [first.select_resource(candidates) for _ in range(30)] == \
+        [second.select_resource(candidates) for _ in range(30)]
+
+
+@pytest.mark.skipif(not bandit_optimizer.NUMBA_AVAILABLE, reason="numba not installed")
+def test_ucb_kernel_matches_python_source():
+    bandit = make_bandit(100, "ucb")
+    idx = np.arange(100, dtype=np.intp)
+    log_total = np.log(bandit._total_pulls)
+
+    kernel = bandit_optimizer._ucb_argmax
+    assert kernel(bandit._succ, bandit._pulls, idx, log_total, 2.0) == \
+        kernel.py_func(bandit._succ, bandit._pulls, idx, log_total, 2.0)
+
+
+def test_resource_statistics_read_through_to_bandit():
+    resource = Resource(id="r", title="R", type="video", concept="loops", difficulty=0.5)
+    assert (resource.successes, resource.failures, resource.pulls) == (0, 0, 0)
+
+    bandit = MultiArmedBandit()
+    bandit.add_resource(resource, successes=2, failures=1, pulls=3)
+    bandit.update_reward("r", True)
+
+    assert (resource.successes, resource.failures, resource.pulls) == (3, 1, 4)
+    with pytest.raises(AttributeError):
+        resource.pulls = 0
@@ -0,0 +1,61 @@
+"""BetaKT: the vectorized array path agrees with a per-attempt reference."""
+import random
+
+import numpy as np
+import pytest
+
+from models.beta_kt import BetaKT
+
+
+def reference_mastery(model: BetaKT, attempts, prior_mastery=None):
+    """Straightforward per-concept loop over the same formulas."""
+    prior_mastery = prior_mastery or {}
+    mastery = {}
+    for concept in {a['concept'] for a in attempts}:
+        outcomes = [a['correct'] for a in attempts if a['concept'] == concept]
+        n, s = len(outcomes), sum(outcomes)
+        post_mean = (s + model.alpha) / (n + model.alpha + model.beta)
+        if concept in prior_mastery:
+            weight = n / (n + model.blend_weight)
+            post_mean = weight * post_mean + (1 - weight) * prior_mastery[concept]
+        mastery[concept] = post_mean
+    for concept, prior in prior_mastery.items():
+        mastery.setdefault(concept, prior)
+    return mastery
+
+
+@pytest.fixture
+def attempts():
+    rng = random.Random(0)
+    return [{'concept': f"c{rng.randrange(15)}", 'correct': rng.random() < 0.7} for _ in range(300)]
+
+
+@pytest.mark.parametrize("prior_mastery", [None, {'c0': 0.9, 'c3': 0.1, 'unseen': 0.4}])
+def test_array_path_matches_reference(attempts, prior_mastery):
+    model = BetaKT(alpha=2.0, beta=1.5, blend_weight=3.0)
+
+    result = model.predict_mastery_arrays(
+        [a['concept'] for a in attempts],
+        np.array([a['correct'] for a in attempts], dtype=np.float64),
+        prior_mastery
+    )
+
+    expected = reference_mastery(model, attempts, prior_mastery)
+    assert result.keys() == expected.keys()
+    assert result == pytest.approx(expected)
+
+
+def test_predict_mastery_matches_array_path(attempts):
+    model = BetaKT()
+    prior = {'c1': 0.6}
+
+    assert model.predict_mastery(attempts, prior) == model.predict_mastery_arrays(
+        [a['concept'] for a in attempts], np.array([a['correct'] for a in attempts], dtype=np.float64), prior
+    )
+
+
+def test_no_attempts_returns_prior():
+    model = BetaKT()
+
+    assert model.predict_mastery([], {'loops': 0.25}) == {'loops': 0.25}
+    assert model.predict_mastery([]) == {}
@@ -0,0 +1,115 @@
+"""BKT-IRT hybrid: batch/sequential parity and persistence round trips."""
+import random
+
+import numpy as np
+import pytest
+
+from bkt_irt_hybrid import BKTIRTHybrid
+
+CONCEPTS = [f"c{i}" for i in range(12)]
+USERS = [f"u{i}" for i in range(8)]
+FIELDS = ('prior_mastery', 'posterior_mastery', 'confidence', 'ability', 'standard_error')
+
+
+def make_model() -> BKTIRTHybrid:
+    model = BKTIRTHybrid()
+    for i, concept in enumerate(CONCEPTS[:8]):
+        model.initialize_concept(concept, difficulty=i / 4 - 1, slip=0.05 + i / 100, guess=0.1 + i / 200)
+    return model
+
+
+def assert_state_close(actual: dict, expected: dict):
+    """Knowledge states agree up to float32 storage / fastmath rounding."""
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        if key == 'confidence_intervals':
+            assert actual[key].keys() == value.keys()
+            for concept, bounds in value.items():
+                assert actual[key][concept] == pytest.approx(bounds, abs=1e-5)
+        elif isinstance(value, (dict, float)):
+            assert actual[key] == pytest.approx(value, abs=1e-5)
+        else:
+            assert actual[key] == value
+
+
+@pytest.fixture
+def attempts():
+    rng = random.Random(0)
+    return [
+        (rng.choice(USERS), rng.choice(CONCEPTS), rng.random() < 0.6, rng.random() * 90)
+        for _ in range(400)
+    ]
+
+
+@pytest.fixture
+def trained(attempts):
+    model = make_model()
+    for user_id, concept_id, correct, time_spent in attempts:
+        model.update_mastery(user_id, concept_id, correct, time_spent)
+    return model
+
+
+def test_batch_matches_sequential(attempts, trained):
+    sequential = make_model()
+    expected = [sequential.update_mastery(*attempt) for attempt in attempts]
+
+    batch = make_model()
+    out = batch.update_mastery_batch(
+        [a[0] for a in attempts], [a[1] for a in attempts],
+        np.array([a[2] for a in attempts]), np.array([a[3] for a in attempts])
+    )
+
+    for field in FIELDS:
+        np.testing.assert_allclose(out[field], [getattr(e, field) for e in expected], atol=1e-5)
+    for user_id in USERS:
+        assert_state_close(batch.get_knowledge_state(user_id), trained.get_knowledge_state(user_id))
+
+
+def test_learning_velocity_same_for_batch_and_sequential(attempts, trained):
+    batch = make_model()
+    batch.update_mastery_batch(
+        [a[0] for a in attempts], [a[1] for a in attempts],
+        np.array([a[2] for a in attempts]), np.array([a[3] for a in attempts])
+    )
+    velocities = [trained.get_knowledge_state(u)['learning_velocity'] for u in USERS]
+
+    assert [batch.get_knowledge_state(u)['learning_velocity'] for u in USERS] == pytest.approx(velocities)
+    # Replayed history must not collapse to the neutral 0.5
+    assert any(abs(v - 0.5) > 1e-3 for v in velocities)
+
+
+def test_predict_performance_all_matches_single(trained):
+    for user_id in USERS[:3]:
+        everything = trained.predict_performance_all(user_id)
+        for concept_id in CONCEPTS:
+            assert everything[concept_id] == pytest.approx(trained.predict_performance(user_id, concept_id))
+
+
+def test_export_load_state_round_trip(trained):
+    state = trained.export_state()
+    restored = BKTIRTHybrid()
+    restored.load_state(state)
+
+    assert restored.export_state() == state
+
+
+def test_dumps_loads_round_trip(trained):
+    restored = BKTIRTHybrid.loads(trained.dumps())
+
+    assert restored.export_state() == trained.export_state()
+
+
+def test_save_load_round_trip(trained, tmp_path):
+    path = tmp_path / "bkt.npz"
+    trained.save(str(path))
+    restored = BKTIRTHybrid()
+    restored.load(str(path))
+
+    assert restored.export_state() == trained.export_state()
+    for user_id in USERS:
+        restored_state = restored.get_knowledge_state(user_id)
+        # History isn't persisted, so velocity restarts neutral
+        assert restored_state.pop('learning_velocity') == 0.5
+        expected = trained.get_knowledge_state(user_id)
+        del expected['learning_velocity']
+        assert_state_close(restored_state, expected)
@@ -0,0 +1,91 @@
+"""Collaboration endpoints, including the opt-in process pool for large quizzes."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import collaboration_service
+
+
+def make_client(monkeypatch, processes: int = 0) -> TestClient:
+    monkeypatch.setenv("AI_SERVICE_COLLAB_PROCESSES", str(processes))
+    app = FastAPI()
+    collaboration_service.add_collaboration_routes(app)
+    return TestClient(app)
+
+
+def quiz_body(n_members: int, n_concepts: int) -> dict:
+    return {
+        "concepts": [f"concept{i}" for i in range(n_concepts)],
+        "memberMasteries": [
+            {"userId": f"u{i}", "userName": f"User {i}", "mastery": {"concept0": i / n_members}}
+            for i in range(n_members)
+        ]
+    }
+
+
+def chat(*messages: str) -> list:
+    return [{"user": {"name": "ana"}, "message": m, "timestamp": "2024-01-01T00:00:00"} for m in messages]
+
+
+def test_generate_group_quiz(monkeypatch):
+    with make_client(monkeypatch) as client:
+        response = client.post("/generate_group_quiz", json=quiz_body(3, 2))
+
+    assert response.status_code == 200
+    quiz = response.json()
+    assert {"teamChallenge", "individualQuestions", "collaborativeProblem", "generatedAt"} <= quiz.keys()
+    assert [q["memberId"] for q in quiz["individualQuestions"]] == ["u0", "u1", "u2"]
+
+
+def test_generate_group_quiz_batch(monkeypatch):
+    bodies = [quiz_body(2, 1), quiz_body(0, 2), quiz_body(4, 3)]
+    with make_client(monkeypatch) as client:
+        response = client.post("/generate_group_quiz_batch", json=bodies)
+
+    assert response.status_code == 200
+    assert [len(q["individualQuestions"]) for q in response.json()] == [2, 0, 4]
+
+
+@pytest.mark.parametrize("processes", [0, 1])
+def test_large_quiz_with_and_without_process_pool(monkeypatch, processes):
+    n_members, n_concepts = 25, 40
+    assert n_members * n_concepts >= collaboration_service._PROCESS_POOL_MIN_QUESTIONS
+
+    with make_client(monkeypatch, processes) as client:
+        response = client.post("/generate_group_quiz", json=quiz_body(n_members, n_concepts))
+
+    assert response.status_code == 200
+    questions = response.json()["individualQuestions"]
+    assert [q["memberId"] for q in questions] == [f"u{i}" for i in range(n_members)]
+
+
+def test_facilitate_group(monkeypatch):
+    with make_client(monkeypatch) as client:
+        response = client.post("/facilitate_group", json={"chatHistory": chat("recursion is hard", "recursion again")})
+
+    assert response.status_code == 200
+    assert "summary" in response.json()
+
+
+def test_assign_roles(monkeypatch):
+    members = [
+        {"userId": "a", "userName": "A", "mastery": {"loops": 0.9}},
+        {"userId": "b", "userName": "B", "mastery": {"loops": 0.2}},
+    ]
+    with make_client(monkeypatch) as client:
+        response = client.post("/assign_roles", json={"members": members, "strategy": "strengths"})
+
+    assert response.status_code == 200
+    roles = {r["userId"]: r["role"] for r in response.json()["roles"]}
+    assert roles.keys() == {"a", "b"}
+    assert len(set(roles.values())) == 2
+
+
+def test_summarize_conversation(monkeypatch):
+    with make_client(monkeypatch) as client:
+        ok = client.post("/summarize_conversation", json={"messages": chat("loops loops", "functions")})
+        invalid = client.post("/summarize_conversation", json={"messages": 3})
+
+    assert ok.status_code == 200
+    assert "keyPoints" in ok.json()
+    assert invalid.status_code == 422
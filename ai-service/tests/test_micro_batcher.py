@@ -0,0 +1,84 @@
+"""DynamicBatcher: results, output-count mismatches and shutdown."""
+import asyncio
+import threading
+
+import pytest
+
+from micro_batcher import DynamicBatcher
+
+
+def test_results_match_inputs():
+    async def scenario():
+        batcher = DynamicBatcher(lambda xs: [x * 2 for x in xs], max_wait_ms=5)
+        try:
+            return await asyncio.gather(*[batcher.submit(i) for i in range(10)])
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(scenario()) == [i * 2 for i in range(10)]
+
+
+def test_short_output_fails_every_caller():
+    async def scenario():
+        batcher = DynamicBatcher(lambda xs: xs[:-1], max_wait_ms=5)
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(*[batcher.submit(i) for i in range(4)], return_exceptions=True), 5
+            )
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+    assert results and all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_stop_fails_in_flight_and_queued_requests():
+    release = threading.Event()
+
+    def slow_batch(xs):
+        release.wait(5)
+        return xs
+
+    async def scenario():
+        batcher = DynamicBatcher(slow_batch, max_batch_size=1)
+        tasks = [asyncio.create_task(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0.05)  # first item in the executor, the rest queued
+        await batcher.stop()
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 5)
+
+    results = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_restart_after_stop():
+    async def scenario():
+        batcher = DynamicBatcher(lambda xs: xs)
+        assert await batcher.submit(1) == 1
+        await batcher.stop()
+        try:
+            return await batcher.submit(2)
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(scenario()) == 2
+
+
+@pytest.mark.parametrize("size", [1, 7])
+def test_batches_respect_max_size(size):
+    seen = []
+
+    def record(xs):
+        seen.append(len(xs))
+        return xs
+
+    async def scenario():
+        batcher = DynamicBatcher(record, max_batch_size=size, max_wait_ms=5)
+        try:
+            await asyncio.gather(*[batcher.submit(i) for i in range(20)])
+        finally:
+            await batcher.stop()
+
+    asyncio.run(scenario())
+    assert sum(seen) == 20 and max(seen) <= size
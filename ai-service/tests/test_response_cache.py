@@ -0,0 +1,86 @@
+"""Response cache: request keys, TTL expiry and LRU eviction."""
+import asyncio
+
+from pydantic import BaseModel
+
+import response_cache
+from response_cache import TTLCache, cached_endpoint, request_key
+
+
+class Body(BaseModel):
+    user_id: str
+    mastery: dict = {}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_request_key_stable_and_discriminating():
+    body = Body(user_id="a", mastery={"loops": 0.5})
+
+    assert request_key(body) == request_key(Body(user_id="a", mastery={"loops": 0.5}))
+    assert request_key(body) != request_key(Body(user_id="a", mastery={"loops": 0.6}))
+    assert request_key(body) != request_key(Body(user_id="b", mastery={"loops": 0.5}))
+    # Keyword order doesn't matter, values do
+    assert request_key(x=1, y=2) == request_key(y=2, x=1)
+    assert request_key(x=1, y=2) != request_key(x=2, y=1)
+    assert len(request_key(body)) == 16
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    cache = TTLCache(ttl=10.0)
+    cache.set(b"k", "v")
+
+    clock.now += 9.9
+    assert cache.get(b"k") == "v"
+    clock.now += 0.2
+    assert cache.get(b"k") is response_cache._MISSING
+    assert cache.stats()['currsize'] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set(b"a", 1)
+    cache.set(b"b", 2)
+    cache.get(b"a")  # a becomes most recent
+    cache.set(b"c", 3)
+
+    assert cache.get(b"b") is response_cache._MISSING
+    assert cache.get(b"a") == 1
+    assert cache.get(b"c") == 3
+
+
+def test_cached_endpoint_hits_and_clear(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    calls = []
+
+    @cached_endpoint(ttl=5.0)
+    async def endpoint(req: Body):
+        calls.append(req.user_id)
+        return {"user": req.user_id, "n": len(calls)}
+
+    async def scenario():
+        first = await endpoint(Body(user_id="a"))
+        assert await endpoint(Body(user_id="a")) == first
+        await endpoint(Body(user_id="b"))
+        clock.now += 6.0
+        await endpoint(Body(user_id="a"))
+        response_cache.clear_endpoint_caches()
+        await endpoint(Body(user_id="a"))
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        response_cache.endpoint_caches.pop("endpoint", None)
+
+    assert calls == ["a", "b", "a", "a"]
+    assert endpoint.cache.hits == 1